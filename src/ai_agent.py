@@ -1,66 +1,181 @@
-import threading
 import state
+import engine
 import uci_utils
-from ai_interface import get_best_move_from_stockfish, get_evaluation_and_move, get_ai_coach_commentary
+import move_codec
+import move_logic
+import time_manager
+import opening_book
+import ai_interface
+from ai_interface import submit_analysis, format_score, get_ai_coach_commentary, HINT_MULTIPV
+from engine_pool import PRIORITY_BOT, PRIORITY_HINT
+
+HINT_PV_MOVES = 4  # Moves of each candidate line kept for display
+
+# Polyglot book probed before every bot search (OPENING_BOOK); None without one
+book = opening_book.load_book()
+
+# Engine requests in flight as (future, handler); poll() runs each handler on the main thread
+_requests = []
+
+# (PonderSession, ply count when the bot was asked) while the bot ponders the human's reply
+_ponder = None
+
+def poll():
+    """Called once per frame: hands finished engine results to their handlers."""
+    for request in [r for r in _requests if r[0].done()]:
+        _requests.remove(request)
+        future, handler = request
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"--- AI Request Error: {e} ---")
+            result = None
+        try:
+            handler(result)
+        except Exception as e:
+            print(f"--- AI Logic Error: {e} ---")
+
+def _take_ponder():
+    global _ponder
+    ponder, _ponder = _ponder, None
+    return ponder
+
+def cancel_ponder():
+    """Abandons pondering, e.g. after an undo or when the bot is switched off."""
+    ponder = _take_ponder()
+    if ponder:
+        ponder[0].miss()
+
+def _is_ponder_hit(ponder):
+    """True if the two plies since pondering started are exactly the bot's move and the expected reply."""
+    session, start_ply = ponder
+    if len(state.move_history) != start_ply + 2:
+        return False
+    return [move_codec.move_to_uci(m) for m in state.move_history[-2:]] == session.moves
+
+def _book_move(legal_moves):
+    """A legal book move for the current position as UCI, or None to ask the engine."""
+    if book is None:
+        return None
+    move_uci = book.probe_move()
+    start, end = uci_utils.uci_to_grid(move_uci) if move_uci else (None, None)
+    if move_uci and end not in legal_moves.get(start, ()):
+        print(f"--- Ignoring illegal book move {move_uci} ---")  # Hash collision or a broken book
+        return None
+    return move_uci
 
 def perform_ai_turn():
-    """Fetches move from Stockfish and stores it in pending_ai_move."""
+    """Plays a book move, or requests the bot's move; poll() stores it in pending_ai_move."""
     if state.is_ai_thinking: return
     
+    ply = len(state.move_history)
+    color = state.current_turn_color
+    plan = time_manager.plan_move(color)
+    # Last resort if the engine fails or runs out of time: any legal move. The cached list
+    # (start -> targets) is the one the status check and move dots already generated.
+    legal_moves = move_logic.get_cached_legal_moves()
+    ponder = _take_ponder()
+    move_uci = _book_move(legal_moves)
+    if move_uci:
+        if ponder is not None:
+            ponder[0].miss()
+        plan['mode'] = 'book'
+        time_manager.record(plan, ply)
+        stats = book.summary()
+        print(f"--- Book move: {move_uci} (hit rate {stats['hit_rate']:.0%}, "
+              f"{stats['avg_probe_us']:.0f} us per probe) ---")
+        state.pending_ai_move = uci_utils.uci_to_grid(move_uci)
+        return
+
     fen = uci_utils.generate_fen()
-    print(f"--- AI Turn Started ---")
+    print(f"--- AI Turn Started ({plan['mode']}, budget {plan['budget_ms']} ms) ---")
     state.is_ai_thinking = True
-    
-    def fetch_and_move():
-        try:
-            move_uci = get_best_move_from_stockfish(fen)
-            if move_uci:
-                print(f"--- Stockfish chose: {move_uci} ---")
-                coords = uci_utils.uci_to_grid(move_uci)
-                if coords:
-                    state.pending_ai_move = coords  # Main loop picks this up
-            else:
-                print("--- Stockfish returned no move (Game over?) ---")
-        except Exception as e:
-            print(f"--- AI Turn Error: {e} ---")
-        finally:
-            state.is_ai_thinking = False
+    # The bot's search evaluates this position anyway, and must not wait behind the eval bar's
+    engine.cancel_eval()
 
-    threading.Thread(target=fetch_and_move, daemon=True).start()
+    ponder_hit = ponder is not None and _is_ponder_hit(ponder) and plan['mode'] != 'fallback'
+    if ponder_hit:
+        future = ponder[0].hit(fen, plan['timeout_s'], plan['cache_depth'], plan['go_args'])
+    else:
+        if ponder is not None:
+            ponder[0].miss()
+        future = submit_analysis(fen, PRIORITY_BOT, depth=plan['cache_depth'],
+                                 go_args=plan['go_args'], timeout=plan['timeout_s'])
+
+    def on_move(result):
+        global _ponder
+        state.is_ai_thinking = False
+        entry = time_manager.record(plan, ply)
+        print(f"--- Bot thought {entry['actual_ms']} ms of a {entry['budget_ms']} ms budget ---")
+        if result:
+            state.ai_eval_score = format_score(result['score'])
+        move_uci = result['best_move'] if result else None
+        if not move_uci and legal_moves:
+            (sr, sc), targets = next(iter(legal_moves.items()))
+            er, ec = targets[0]
+            move_uci = move_codec.square_name(sr * 8 + sc) + move_codec.square_name(er * 8 + ec)
+            print(f"--- Engine gave no answer; playing fallback move {move_uci} ---")
+        if not move_uci:
+            print(f"--- {ai_interface.engine_name} returned no move (Game over?) ---")
+            return
+        print(f"--- {ai_interface.engine_name} chose: {move_uci} ---")
+        if ponder_hit:
+            stats = ai_interface.ponder_summary()
+            print(f"--- Ponder: {stats['avg_saved_ms']} ms saved on average, hit rate {stats['hit_rate']:.0%} ---")
+        coords = uci_utils.uci_to_grid(move_uci)
+        if coords:
+            # Ponder the expected reply from the position before the bot's move + both plies
+            if len(result['pv']) >= 2 and result['pv'][0] == move_uci:
+                session = ai_interface.start_ponder(fen, result['pv'][:2])
+                if session:
+                    _ponder = (session, ply)
+            state.pending_ai_move = coords  # Main loop picks this up
+
+    _requests.append((future, on_move))
+
+def _format_move(move):
+    """'e2e4' -> 'E2-E4' for the sidebar."""
+    return f"{move[0]}{move[1]}-{move[2]}{move[3]}".upper() if len(move) >= 4 else move.upper()
 
 def get_ai_hint():
-    """Asks for a hint and updates the coach message."""
+    """Asks for a hint (the top HINT_MULTIPV moves from one search) and updates the coach message."""
     if state.is_ai_thinking: return
     
     fen = uci_utils.generate_fen()
     print(f"--- Requesting Hint ---")
     state.is_ai_thinking = True
     
-    def fetch_hint():
-        try:
-            move, eval_val = get_evaluation_and_move(fen)
-            state.ai_eval_score = eval_val if eval_val else "?"
-            if move:
-                state.last_hint_move = move   # Store raw UCI for bottom bar
-                # Format as e2-e4 for sidebar
-                move_fmt = f"{move[0]}{move[1]}-{move[2]}{move[3]}" if len(move) >= 4 else move
-                print(f"--- Best Move: {move_fmt}  |  Eval: {eval_val} ---")
-                state.ai_coach_message = f"Best move is {move_fmt.upper()}. Analyzing..."
-                get_ai_coach_commentary(fen, move, eval_val, update_coach_text)
-            else:
-                state.ai_coach_message = "No clear best move found."
-        except Exception as e:
-            print(f"--- Hint Logic Error: {e} ---")
-            state.ai_coach_message = "Coach had an error."
-        finally:
-            state.is_ai_thinking = False
+    def on_hint(result):
+        state.is_ai_thinking = False
+        move = result['best_move'] if result else None
+        eval_val = format_score(result['score']) if result else None
+        state.ai_eval_score = eval_val if eval_val else "?"
+        lines = (result.get('lines') or []) if result else []
+        state.hint_lines = [(line['move'], format_score(line['score']), line['pv'][:HINT_PV_MOVES])
+                            for line in lines[:HINT_MULTIPV]]
+        if move:
+            state.last_hint_move = move   # Store raw UCI for bottom bar
+            alternatives = [(alt, score) for alt, score, _ in state.hint_lines if alt != move]
+            print(f"--- Best Move: {_format_move(move)}  |  Eval: {eval_val} ---")
+            for rank, (alt, score, pv) in enumerate(state.hint_lines, 1):
+                print(f"---   {rank}. {alt} {score}  ({' '.join(pv)}) ---")
+            state.ai_coach_message = f"Best move is {_format_move(move)}. Analyzing..."
+            get_ai_coach_commentary(fen, move, eval_val, update_coach_text, alternatives)
+        else:
+            state.ai_coach_message = "No clear best move found."
 
-    threading.Thread(target=fetch_hint, daemon=True).start()
+    _requests.append((submit_analysis(fen, PRIORITY_HINT, multipv=HINT_MULTIPV), on_hint))
 
 def update_coach_text(text):
     """Callback to update coach message with LLM commentary + move notation."""
     if state.last_hint_move and len(state.last_hint_move) >= 4:
-        move_fmt = f"{state.last_hint_move[0]}{state.last_hint_move[1]}-{state.last_hint_move[2]}{state.last_hint_move[3]}".upper()
-        state.ai_coach_message = f"{text}\n\nBest Move: {move_fmt}"
+        message = f"{text}\n\nBest Move: {_format_move(state.last_hint_move)}"
+        if state.hint_lines and state.hint_lines[0][0] == state.last_hint_move:
+            message += f"\nLine: {' '.join(state.hint_lines[0][2])}"
+        others = [f"{_format_move(alt)} ({score})" for alt, score, _ in state.hint_lines
+                  if alt != state.last_hint_move]
+        if others:
+            message += f"\nAlternatives: {', '.join(others)}"
+        state.ai_coach_message = message
     else:
         state.ai_coach_message = text
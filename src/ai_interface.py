@@ -1,9 +1,14 @@
 import os
-import threading
+import sys
+import time
+import atexit
+import asyncio
 import logging
-from stockfish import Stockfish
-import google.generativeai as genai
 from dotenv import load_dotenv
+from engine_pool import EnginePool, EnginePoolTimeout, PRIORITY_BOT, PRIORITY_HINT, PRIORITY_EVAL
+from analysis_cache import AnalysisCache
+from uci_driver import EngineLoop, UciEngine
+from coach import CoachService, GeminiBackend, StubBackend
 
 load_dotenv()
 
@@ -11,131 +16,315 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Thread Lock for Stockfish (Mandatory to prevent engine crashes)
-engine_lock = threading.Lock()
+AI_STATUS = "Initializing..."
 
-# Initialize Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# --- Engine Pool ---
+# N engine processes shared by the bot, hints and live eval (see engine_pool.py).
+# Each Stockfish gets an equal share of the CPU cores.
+stockfish_path = os.getenv("STOCKFISH_PATH")
+CPU_COUNT = os.cpu_count() or 2
+# At least 2 even on 1-2 cores, so the bot never queues behind the eval bar or a hint and a
+# spare engine can ponder; the cores are split between them
+ENGINE_POOL_SIZE = int(os.getenv("ENGINE_POOL_SIZE", "0")) or max(2, min(3, CPU_COUNT // 2))
+ENGINE_THREADS = max(1, CPU_COUNT // ENGINE_POOL_SIZE)
 
-# Try to find a working model
-try:
-    # Use gemini-1.5-flash as default, but allow easy fallback
-    model_name = 'gemini-3-flash-preview' 
-    model = genai.GenerativeModel(model_name)
-    print(f"--- Gemini loaded with model: {model_name} ---")
-except Exception as e:
-    logger.error(f"Gemini model load error: {e}")
-    print(f"--- Gemini model {model_name} error, trying fallback... ---")
-    model = genai.GenerativeModel('gemini-pro')
+STOCKFISH_SKILL_LEVEL = 20  # Max skill
 
-AI_STATUS = "Initializing..."
+# --- Built-in Engine Fallback ---
+# Without Stockfish, moves and evaluations come from native_engine.py running as its own
+# UCI process (so its search never touches the live board).
+NATIVE_ENGINE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "native_engine.py")
+NATIVE_DEPTH = 4
+NATIVE_MOVETIME_MS = 2000  # Ceiling; a search cut short reports (and caches) the depth it reached
+ANALYSIS_TIMEOUT_S = float(os.getenv("ANALYSIS_TIMEOUT", "60"))
 
-# Initialize Stockfish (Global instance for efficiency)
-stockfish_path = os.getenv("STOCKFISH_PATH")
-engine = None
-try:
+# Every engine is driven from this one asyncio loop thread (see uci_driver.py)
+engine_loop = EngineLoop()
+
+async def _start_stockfish():
+    return await UciEngine.start([stockfish_path], {"Threads": ENGINE_THREADS, "Skill Level": STOCKFISH_SKILL_LEVEL},
+                                 name="Stockfish")
+
+async def _start_native_engine():
+    engine = await UciEngine.start([sys.executable, NATIVE_ENGINE_SCRIPT], name="built-in engine")
+    print("--- Built-in engine process started ---")
+    return engine
+
+def _engine_alive(engine):
+    return engine.is_alive()
+
+async def _close_engine(engine):
+    await engine.quit()
+
+async def _check_pool(pool):
+    """Starts one engine now so a broken binary shows up at launch."""
+    pool.release(await pool.acquire())
+
+# --- Warm-up ---
+# Nothing is spawned at import: start_warmup() (called by main.py once the window is up, or by
+# the first analysis) picks Stockfish or the built-in engine and starts one process on
+# engine_loop, updating AI_STATUS as it goes. Engine requests wait for it in _engine_ready().
+use_stockfish = False
+engine_pool = None
+engine_name = "Engine"  # "Stockfish" or "Built-in engine" once warm-up has picked one, for log lines
+READY_STATUS = "Ready"
+ANALYSIS_DEPTH = int(os.getenv("ANALYSIS_DEPTH", "0"))  # 0 until warm-up picks the engine's default
+warmup_ms = None
+_warmup = None
+
+async def _warm_up():
+    global AI_STATUS, READY_STATUS, use_stockfish, engine_pool, engine_name, ANALYSIS_DEPTH, warmup_ms
+    started = time.perf_counter()
     if stockfish_path and os.path.exists(stockfish_path):
-        engine = Stockfish(path=stockfish_path)
-        engine.set_skill_level(20) # Max skill
-        AI_STATUS = "Ready"
-        print(f"--- Stockfish initialized successfully ---")
+        AI_STATUS = "Starting Stockfish..."
+        pool = EnginePool(_start_stockfish, ENGINE_POOL_SIZE, _engine_alive, _close_engine, name="Stockfish")
+        try:
+            await asyncio.wait_for(_check_pool(pool), 30)
+            engine_pool, use_stockfish, engine_name = pool, True, "Stockfish"
+            READY_STATUS = "Ready"
+            print(f"--- Stockfish pool initialized: {ENGINE_POOL_SIZE} engines x {ENGINE_THREADS} threads ---")
+        except Exception as e:
+            READY_STATUS = f"Engine Error: {str(e)[:20]}"
+            print(f"--- Error initializing Stockfish: {e} ---")
+            await pool.close()
     else:
-        AI_STATUS = "Engine Path Error"
-        print(f"--- Stockfish path not found: {stockfish_path} ---")
-except Exception as e:
-    AI_STATUS = f"Engine Error: {str(e)[:20]}"
-    print(f"--- Error initializing Stockfish: {e} ---")
-    engine = None
+        READY_STATUS = "Ready (Built-in Engine)"
+        print(f"--- Stockfish path not found: {stockfish_path}, using the built-in engine ---")
+    ANALYSIS_DEPTH = ANALYSIS_DEPTH or (15 if use_stockfish else NATIVE_DEPTH)
+    if engine_pool is None:
+        AI_STATUS = "Starting built-in engine..."
+        engine_pool = EnginePool(_start_native_engine, ENGINE_POOL_SIZE, _engine_alive, _close_engine,
+                                 name="built-in engine")
+        engine_name = "Built-in engine"
+        try:
+            await _check_pool(engine_pool)
+        except Exception as e:
+            READY_STATUS = f"Engine Error: {str(e)[:20]}"
+            logger.error(f"Built-in engine failed to start: {e}")
+    AI_STATUS = READY_STATUS
+    warmup_ms = int((time.perf_counter() - started) * 1000)
+    print(f"--- Engine warm-up finished in {warmup_ms} ms ---")
+
+def start_warmup():
+    """Starts the engine warm-up in the background (once); returns its future."""
+    global _warmup, AI_STATUS
+    if _warmup is None:
+        AI_STATUS = "Starting engine..."
+        _warmup = engine_loop.submit(_warm_up())
+    return _warmup
+
+async def _engine_ready():
+    await asyncio.wrap_future(start_warmup())
+
+def _close_pool():
+    if engine_pool is not None:
+        engine_loop.call(engine_pool.close(), timeout=5)
+
+atexit.register(_close_pool)
+
+# --- Analysis Cache ---
+# Results keyed by position (see analysis_cache.py); ANALYSIS_CACHE_PATH adds an on-disk tier.
+analysis_cache = AnalysisCache(int(os.getenv("ANALYSIS_CACHE_SIZE", "4096")), os.getenv("ANALYSIS_CACHE_PATH"))
+
+# Candidate moves a hint asks for; they come from one MultiPV search sharing the hint's budget
+HINT_MULTIPV = max(1, int(os.getenv("HINT_MULTIPV", "3")))
+
+def _go_args(depth, ponder=False):
+    go = "ponder " if ponder else ""
+    if use_stockfish:
+        return f"{go}depth {depth}"
+    return f"{go}depth {depth} movetime {NATIVE_MOVETIME_MS}"
+
+def format_score(score):
+    """Formats a White-relative score as the string shown in the UI ("+0.35", "Mate in -2", "Checkmate")."""
+    val = score['value']
+    if score['type'] == 'cp':
+        return f"{val / 100.0:+}"
+    if val == 0:
+        return "Checkmate"  # Mate 0: the side to move is already mated
+    return f"Mate in {abs(val)}" if val > 0 else f"Mate in -{abs(val)}"
+
+def analysis_cache_stats():
+    return analysis_cache.stats()
 
 def is_engine_ready():
-    return engine is not None
+    """True once warm-up has started an engine (Stockfish if configured, otherwise the built-in one)."""
+    return _warmup is not None and _warmup.done()
 
-def get_best_move_from_stockfish(fen):
-    """Asks Stockfish for the best move in UCI format (e.g., 'e2e4')."""
-    global AI_STATUS
-    if not engine:
-        return None
-    with engine_lock:
-        try:
-            old_status = AI_STATUS
-            AI_STATUS = "Thinking..."
-            logger.info(f"Engine Move Request: {fen}")
-            engine.set_fen_position(fen)
-            move = engine.get_best_move()
-            logger.info(f"Engine Best Move: {move}")
-            AI_STATUS = old_status
-            return move
-        except Exception as e:
-            AI_STATUS = "Engine Error"
-            logger.error(f"Stockfish Move Error: {e}")
-            return None
+# --- Coach ---
+# Commentary requests are cached, coalesced and rate-limited by coach.py. COACH_BACKEND=stub
+# swaps Gemini for a deterministic local stand-in (no network, no API key). The Gemini client
+# is only built on the first request.
+COACH_BACKEND = os.getenv("COACH_BACKEND", "gemini")
+coach_service = CoachService(StubBackend() if COACH_BACKEND == "stub"
+                             else GeminiBackend(os.getenv("GEMINI_API_KEY")))
 
-def get_ai_coach_commentary(fen, best_move, evaluation, callback):
+def get_ai_coach_commentary(fen, best_move, evaluation, callback, alternatives=()):
     """
-    Non-blocking thread to fetch natural language commentary from Gemini.
+    Non-blocking request for natural language commentary from the coach.
+    'alternatives' are (move, evaluation) pairs for the runner-up moves, if any.
     Calls 'callback(commentary)' when finished.
     """
     global AI_STATUS
-    if not model:
-        callback("Coach is unavailable (Model Init Failed)")
-        return
 
-    def run():
+    def done(text, ok):
         global AI_STATUS
-        prompt = f"""
-        You are a Grandmaster Chess Coach. 
-        Current Board (FEN): {fen}
-        Stockfish Evaluation: {evaluation}
-        Best Move (UCI): {best_move}
-        
-        Provide a concise (maximum 2 sentences) explanation of why this move is good or 
-        what the strategic goal is. Speak like a helpful mentor.
-        """
-        try:
-            AI_STATUS = "Coach thinking..."
-            response = model.generate_content(prompt)
-            callback(response.text.strip())
-            AI_STATUS = "Ready"
-        except Exception as e:
+        if ok:
+            AI_STATUS = READY_STATUS
+            callback(text)
+        else:
             AI_STATUS = "Coach Error"
-            logger.error(f"Gemini Error: {e}")
-            print(f"--- Gemini Conversation Error: {e} ---")
+            print(f"--- Gemini Conversation Error: {text} ---")
             callback(f"Coach had an error (See console)")
 
-    threading.Thread(target=run).start()
+    AI_STATUS = "Coach thinking..."
+    coach_service.request(fen, best_move, evaluation, done, alternatives)
 
-def get_evaluation_and_move(fen):
-    """Returns (best_move, evaluation_score). Perspective is always WHITE."""
+async def analyse_async(fen, priority=PRIORITY_HINT, depth=None, token=None, info_callback=None,
+                        go_args=None, timeout=None, multipv=1):
+    """Analyses `fen` with a single engine search, or answers from the analysis cache.
+
+    Returns {'best_move', 'score', 'depth', 'nodes', 'nps', 'time_ms', 'pv', 'lines'} with
+    scores White-relative, or None if the engine failed. With `multipv` > 1, 'lines' holds the
+    top candidate moves ({'move', 'score', 'depth', 'pv'}, best first) from the same search. `priority` routes the request in the engine
+    pool: PRIORITY_BOT for the bot's move, PRIORITY_HINT for the hint button, PRIORITY_EVAL
+    for the background eval after each move. A cancelled `token` skips or stops the search;
+    stopped searches are not cached. `info_callback(partial_result)` sees each info line.
+    `go_args` replaces the depth search (e.g. clock limits from time_manager); `depth` then
+    only sets how deep a cached answer must be. After `timeout` seconds (default
+    ANALYSIS_TIMEOUT) the search is stopped and its best move so far returned.
+    Runs on engine_loop; see analyse() and submit_analysis() for other threads.
+    """
     global AI_STATUS
-    if not engine:
-        return None, "Engine Off"
-    with engine_lock:
+    await _engine_ready()
+    depth = depth or ANALYSIS_DEPTH
+    cached = analysis_cache.get(fen, depth, multipv)
+    if cached is not None:
+        return cached
+    if token is not None and token.cancelled:
+        return None
+    try:
+        async with engine_pool.checkout(priority) as engine:
+            AI_STATUS = "Thinking..." if priority == PRIORITY_BOT else "Evaluating..."
+            logger.info(f"Engine Analysis Request: {fen}")
+            engine.set_option("MultiPV", multipv)
+            search = engine.go(fen, go_args or _go_args(depth), info_callback=info_callback)
+            if token is not None:
+                token.attach(lambda: engine_loop.call_soon(engine.stop, search.id))
+            try:
+                result = await engine.wait(search, timeout or ANALYSIS_TIMEOUT_S)
+            finally:
+                if token is not None:
+                    token.detach()
+            logger.info(f"Engine Best Move: {result['best_move']} ({format_score(result['score'])}, "
+                        f"depth {result['depth']}, {result['nps']} nps)")
+            AI_STATUS = READY_STATUS
+    except Exception as e:
+        AI_STATUS = "Engine Error"
+        logger.error(f"Engine Analysis Error: {e}")
+        return None
+    result['multipv'] = multipv
+    if token is None or not token.cancelled:
+        analysis_cache.put(fen, result)
+    return result
+
+def submit_analysis(fen, priority=PRIORITY_HINT, depth=None, info_callback=None, go_args=None, timeout=None,
+                    multipv=1):
+    """Starts analyse_async() on the engine loop; returns a future the caller can poll."""
+    return engine_loop.submit(analyse_async(fen, priority, depth, info_callback=info_callback,
+                                            go_args=go_args, timeout=timeout, multipv=multipv))
+
+def analyse(fen, priority=PRIORITY_HINT, depth=None, token=None):
+    """Blocking analyse_async() for worker threads and scripts."""
+    return engine_loop.call(analyse_async(fen, priority, depth, token))
+
+# --- Pondering ---
+# While the human thinks, a spare engine searches the position after the reply the bot
+# expects (the second move of its PV). ENGINE_PONDER defaults to on only with 2+ engines,
+# since the pondering engine is held until the human moves.
+PONDER_ENABLED = os.getenv("ENGINE_PONDER", "1" if ENGINE_POOL_SIZE > 1 else "0") == "1"
+ponder_stats = {'started': 0, 'hits': 0, 'misses': 0, 'saved_ms': 0}
+
+class PonderSession:
+    """A `go ponder` search on a checked-out engine; finish it with hit() or miss().
+    Both return futures and may be called from any thread."""
+    def __init__(self, fen, moves, depth=None):
+        self.moves = moves
+        self.engine = None
+        self.search = None
+        self._started = engine_loop.submit(self._start(fen, depth))
+
+    async def _start(self, fen, depth):
+        """Takes an idle engine only; returns False if none is free."""
+        await _engine_ready()
+        depth = depth or ANALYSIS_DEPTH
         try:
-            AI_STATUS = "Evaluating..."
-            engine.set_fen_position(fen)
-            move = engine.get_best_move()
-            eval_data = engine.get_evaluation()
-            
-            # Safe split for FEN
-            parts = fen.split(' ')
-            is_white_turn = parts[1] == 'w' if len(parts) > 1 else True
-            
-            if eval_data['type'] == 'cp':
-                val = eval_data['value']
-                if not is_white_turn:
-                    val = -val
-                score = val / 100.0
-                eval_str = f"{score:+}"
-            else:
-                # Mate
-                val = eval_data['value']
-                if not is_white_turn:
-                    val = -val
-                eval_str = f"Mate in {abs(val)}" if val > 0 else f"Mate in -{abs(val)}"
-                
-            AI_STATUS = "Ready"
-            return move, eval_str
+            self.engine = await engine_pool.acquire(PRIORITY_EVAL, timeout=0)
+        except EnginePoolTimeout:
+            return False
+        try:
+            self.engine.set_option("MultiPV", 1)
+            self.search = self.engine.go(fen, _go_args(depth, ponder=True), self.moves)
         except Exception as e:
-            AI_STATUS = "Eval Error"
-            logger.error(f"Stockfish Eval Error: {e}")
-            return None, "Error"
+            logger.error(f"Ponder Error: {e}")
+            engine_pool.release(self.engine, healthy=False)
+            return False
+        self.started_at = time.perf_counter()
+        ponder_stats['started'] += 1
+        return True
+
+    async def _finish(self, command, timeout=None):
+        """Sends ponderhit/stop and returns the search result (None on failure)."""
+        if not await asyncio.wrap_future(self._started):
+            return None
+        try:
+            command(self.search.id)
+            result = await self.engine.wait(self.search, timeout or ANALYSIS_TIMEOUT_S)
+        except Exception as e:
+            logger.error(f"Ponder Error: {e}")
+            engine_pool.release(self.engine, healthy=False)
+            return None
+        engine_pool.release(self.engine)
+        return result
+
+    async def _hit(self, fen, timeout, depth, go_args):
+        waited_from = time.perf_counter()
+        result = await self._finish(lambda search_id: self.engine.ponderhit(search_id), timeout)
+        if result is None:
+            # Search the real position under the caller's limits (e.g. the clock budget)
+            return await analyse_async(fen, PRIORITY_BOT, depth, go_args=go_args, timeout=timeout)
+        # Search time the human's thinking already paid for
+        saved_ms = min(int((waited_from - self.started_at) * 1000), result['time_ms'])
+        ponder_stats['hits'] += 1
+        ponder_stats['saved_ms'] += saved_ms
+        logger.info(f"Ponder hit on {self.moves[-1]}: {saved_ms} ms saved")
+        analysis_cache.put(fen, result)
+        return result
+
+    async def _miss(self):
+        if await self._finish(lambda search_id: self.engine.stop(search_id)) is not None:
+            ponder_stats['misses'] += 1
+
+    def hit(self, fen, timeout=None, depth=None, go_args=None):
+        """The expected reply was played (`fen` is the position now): future of the bot's analysis.
+        The search is stopped after `timeout` seconds, like analyse_async(). If the ponder search
+        failed, `fen` is searched afresh with `depth` and `go_args`, as analyse_async() would."""
+        return engine_loop.submit(self._hit(fen, timeout, depth, go_args))
+
+    def miss(self):
+        """The human played something else (or the game moved on): stop and free the engine."""
+        return engine_loop.submit(self._miss())
+
+def start_ponder(fen, moves, depth=None):
+    """Starts pondering the position after `moves` (UCI) from `fen` on an idle engine.
+    Returns a PonderSession, or None if pondering is off."""
+    if not PONDER_ENABLED:
+        return None
+    return PonderSession(fen, moves, depth)
+
+def ponder_summary():
+    """Ponder hit rate and the average search time saved per hit."""
+    resolved = ponder_stats['hits'] + ponder_stats['misses']
+    return {**ponder_stats,
+            'hit_rate': ponder_stats['hits'] / resolved if resolved else 0.0,
+            'avg_saved_ms': ponder_stats['saved_ms'] // ponder_stats['hits'] if ponder_stats['hits'] else 0}
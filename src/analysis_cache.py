@@ -0,0 +1,134 @@
+"""Cache of engine analyses keyed by position, so repeated positions skip the search.
+
+An entry is an ai_interface.analyse() result: best move, White-relative score
+({'type': 'cp'|'mate', 'value'}), searched depth, nodes, nps and PV, plus the top candidate
+lines for a MultiPV search. A lookup asking for depth D (and N lines) is answered by any entry
+searched to depth D or deeper (with at least N lines that deep). An entry keeps the deepest
+main result and, separately, the deepest set of MultiPV lines seen for its position, so a
+deeper single-line search never throws away a hint's candidates. The in-memory tier is a
+bounded LRU; an optional SQLite file adds a persistent tier that survives restarts
+(set ANALYSIS_CACHE_PATH).
+"""
+import json
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+def position_key_from_fen(fen):
+    """Placement, side to move, castling and en passant; the move counters don't change the analysis."""
+    return " ".join(fen.split()[:4])
+
+def _lines_depth(entry):
+    """Depth of an entry's MultiPV lines, which can be shallower than its main result."""
+    return entry.get('multipv_depth', entry['depth'])
+
+def _covers(entry, depth, multipv):
+    if multipv <= 1:
+        return entry['depth'] >= depth
+    return entry.get('multipv', 1) >= multipv and _lines_depth(entry) >= depth
+
+def _merge(current, entry):
+    """What to store when `entry` arrives for a position holding `current`: the deeper main
+    result, plus the deepest (then widest) MultiPV lines of the two."""
+    if current is None:
+        return entry
+    main = entry if entry['depth'] >= current['depth'] else current
+    wide = [e for e in (current, entry) if e.get('multipv', 1) > 1]
+    if not wide:
+        return main
+    best_lines = max(wide, key=lambda e: (_lines_depth(e), e['multipv']))
+    if best_lines is main:
+        return main
+    return {**main, 'lines': best_lines['lines'], 'multipv': best_lines['multipv'],
+            'multipv_depth': _lines_depth(best_lines)}
+
+class AnalysisCache:
+    def __init__(self, max_entries=4096, disk_path=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> entry dict, most recently used last
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_path:
+            try:
+                self._db = sqlite3.connect(disk_path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS analysis "
+                                 "(key TEXT PRIMARY KEY, depth INTEGER, entry TEXT)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Analysis cache disk tier disabled: {e}")
+                self._db = None
+
+    def get(self, fen, depth, multipv=1):
+        """Cached entry searched to at least `depth` with at least `multipv` lines, else None."""
+        key = position_key_from_fen(fen)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and _covers(entry, depth, multipv):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if self._db is not None:
+                row = self._db.execute("SELECT entry FROM analysis WHERE key = ? AND depth >= ?",
+                                       (key, depth)).fetchone()
+                disk_entry = json.loads(row[0]) if row else None
+                if disk_entry is not None and _covers(disk_entry, depth, multipv):
+                    self._remember(key, disk_entry)
+                    self.disk_hits += 1
+                    return disk_entry
+            self.misses += 1
+            return None
+
+    def put(self, fen, entry):
+        """Merges an analysis into the cache: see _merge() for what is kept."""
+        key = position_key_from_fen(fen)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None and self._db is not None:
+                try:
+                    row = self._db.execute("SELECT entry FROM analysis WHERE key = ?", (key,)).fetchone()
+                    current = json.loads(row[0]) if row else None
+                except sqlite3.Error as e:
+                    logger.error(f"Analysis cache read failed: {e}")
+            merged = _merge(current, entry)
+            if merged is current:
+                return
+            entry = merged
+            self._remember(key, entry)
+            if self._db is not None:
+                try:
+                    # The memory tier may have evicted a deeper row's entry, so the depth check is repeated here
+                    self._db.execute("INSERT INTO analysis (key, depth, entry) VALUES (?, ?, ?) "
+                                     "ON CONFLICT(key) DO UPDATE SET depth = excluded.depth, entry = excluded.entry "
+                                     "WHERE excluded.depth >= analysis.depth",
+                                     (key, entry['depth'], json.dumps(entry)))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Analysis cache write failed: {e}")
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters; hit_rate counts memory and disk hits together."""
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'hit_rate': (self.hits + self.disk_hits) / total if total else 0.0,
+            }
@@ -0,0 +1,112 @@
+"""Latest-wins scheduling for analyses whose results only matter for the current position.
+
+Every request is tagged with the position it belongs to. While one search runs, newer
+requests replace each other in a single pending slot, so rapid moves or undos never pile
+up searches. A running search for a position that is no longer the latest is stopped
+(UCI `stop` through its SearchToken), and results for anything but the latest position
+are dropped instead of being delivered out of order.
+
+    scheduler = LatestWinsScheduler(run=lambda fen, token: analyse(fen, token=token))
+    scheduler.submit(position_key, fen, on_result)
+"""
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SearchToken:
+    """Lets another thread stop the engine search it is attached to."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = None
+        self.cancelled = False
+
+    def attach(self, stop):
+        """Called by the searcher once `go` is sent; `stop()` must make the engine finish early."""
+        with self._lock:
+            if self.cancelled:
+                stop()
+            else:
+                self._stop = stop
+
+    def detach(self):
+        """Called once the search has finished, so a late cancel() doesn't reach the next search."""
+        with self._lock:
+            self._stop = None
+
+    def cancel(self):
+        # stop() runs under the lock: detach() (and so the engine's release) waits until it is sent
+        with self._lock:
+            self.cancelled = True
+            if self._stop is not None:
+                self._stop()
+                self._stop = None
+
+class LatestWinsScheduler:
+    def __init__(self, run, current_key=None, name="analysis"):
+        """`run(payload, token)` does the work on the scheduler's thread and returns a result
+        (None on failure). `current_key()`, if given, is checked before delivering a result."""
+        self.name = name
+        self._run = run
+        self._current_key = current_key
+        self._cond = threading.Condition()
+        self._pending = None          # (key, payload, callback) of the newest queued request
+        self._latest_key = None
+        self._inflight_key = None
+        self._inflight_token = None
+        self._thread = None
+        self.stats = {'submitted': 0, 'collapsed': 0, 'cancelled': 0, 'stale_dropped': 0, 'delivered': 0}
+
+    def submit(self, key, payload, callback):
+        """Queues `payload` for position `key`; `callback(result)` runs only if `key` is still current."""
+        with self._cond:
+            self.stats['submitted'] += 1
+            self._latest_key = key
+            if self._pending is not None:
+                self.stats['collapsed'] += 1
+                self._pending = None
+            if self._inflight_key == key and not self._inflight_token.cancelled:
+                return  # That search will deliver
+            if self._inflight_token is not None and not self._inflight_token.cancelled:
+                self.stats['cancelled'] += 1
+                self._inflight_token.cancel()
+            self._pending = (key, payload, callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name=f"{self.name}-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        """Drops the queued request and stops the running one; nothing is delivered until the next submit()."""
+        with self._cond:
+            self._pending = None
+            self._latest_key = None
+            if self._inflight_token is not None and not self._inflight_token.cancelled:
+                self.stats['cancelled'] += 1
+                self._inflight_token.cancel()
+
+    def _is_current(self, key):
+        if key != self._latest_key:
+            return False
+        return self._current_key is None or self._current_key() == key
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                key, payload, callback = self._pending
+                self._pending = None
+                token = SearchToken()
+                self._inflight_key, self._inflight_token = key, token
+            try:
+                result = self._run(payload, token)
+            except Exception as e:
+                logger.error(f"{self.name} request failed: {e}")
+                result = None
+            with self._cond:
+                self._inflight_key = self._inflight_token = None
+                fresh = not token.cancelled and self._is_current(key)
+                self.stats['delivered' if fresh else 'stale_dropped'] += 1
+            if fresh:
+                callback(result)
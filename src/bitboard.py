@@ -0,0 +1,113 @@
+"""64-bit bitboard tables and attack generation.
+
+A bitboard is a plain Python int where bit (row * 8 + col) is set for every
+occupied square, using the same row/col grid as state.board (row 0 = rank 8).
+"""
+
+FULL_BOARD = (1 << 64) - 1
+
+# --- Direction Rays ---
+# Positive directions increase the bit index (the nearest blocker is the lowest set bit),
+# negative directions decrease it (the nearest blocker is the highest set bit).
+ROOK_POSITIVE_DIRS = [(1, 0), (0, 1)]
+ROOK_NEGATIVE_DIRS = [(-1, 0), (0, -1)]
+BISHOP_POSITIVE_DIRS = [(1, 1), (1, -1)]
+BISHOP_NEGATIVE_DIRS = [(-1, -1), (-1, 1)]
+
+def _on_board(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
+
+def _build_ray(sq, d_row, d_col):
+    row, col = divmod(sq, 8)
+    ray = 0
+    row, col = row + d_row, col + d_col
+    while _on_board(row, col):
+        ray |= 1 << (row * 8 + col)
+        row, col = row + d_row, col + d_col
+    return ray
+
+def _build_jumps(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        bb = 0
+        for d_row, d_col in offsets:
+            if _on_board(row + d_row, col + d_col):
+                bb |= 1 << ((row + d_row) * 8 + col + d_col)
+        table.append(bb)
+    return table
+
+RAYS = {d: [_build_ray(sq, *d) for sq in range(64)]
+        for d in ROOK_POSITIVE_DIRS + ROOK_NEGATIVE_DIRS + BISHOP_POSITIVE_DIRS + BISHOP_NEGATIVE_DIRS}
+
+# --- Precomputed Leaper Tables ---
+KNIGHT_ATTACKS = _build_jumps([(2,1), (2,-1), (-2,1), (-2,-1), (1,2), (1,-2), (-1,2), (-1,-2)])
+KING_ATTACKS = _build_jumps([(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)])
+# Squares attacked by a pawn of the given color standing on each square
+PAWN_ATTACKS = {
+    'white': _build_jumps([(-1, -1), (-1, 1)]),
+    'black': _build_jumps([(1, -1), (1, 1)]),
+}
+
+def _build_between_and_line():
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for (d_row, d_col), rays in RAYS.items():
+        opposite = RAYS[(-d_row, -d_col)]
+        for sq in range(64):
+            full_line = rays[sq] | opposite[sq] | (1 << sq)
+            path = 0
+            row, col = divmod(sq, 8)
+            row, col = row + d_row, col + d_col
+            while _on_board(row, col):
+                target = row * 8 + col
+                between[sq][target] = path
+                line[sq][target] = full_line
+                path |= 1 << target
+                row, col = row + d_row, col + d_col
+    return between, line
+
+# BETWEEN[a][b]: squares strictly between two aligned squares (0 if not on a common line)
+# LINE[a][b]: the whole rank/file/diagonal through both squares (0 if not on a common line)
+BETWEEN, LINE = _build_between_and_line()
+
+_POS_ROOK_RAYS = [RAYS[d] for d in ROOK_POSITIVE_DIRS]
+_NEG_ROOK_RAYS = [RAYS[d] for d in ROOK_NEGATIVE_DIRS]
+_POS_BISHOP_RAYS = [RAYS[d] for d in BISHOP_POSITIVE_DIRS]
+_NEG_BISHOP_RAYS = [RAYS[d] for d in BISHOP_NEGATIVE_DIRS]
+
+def _slide(sq, occupied, positive_rays, negative_rays):
+    attacks = 0
+    for rays in positive_rays:
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in negative_rays:
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+def rook_attacks(sq, occupied):
+    """Squares a rook on `sq` reaches, stopping at (and including) the first blocker."""
+    return _slide(sq, occupied, _POS_ROOK_RAYS, _NEG_ROOK_RAYS)
+
+def bishop_attacks(sq, occupied):
+    """Squares a bishop on `sq` reaches, stopping at (and including) the first blocker."""
+    return _slide(sq, occupied, _POS_BISHOP_RAYS, _NEG_BISHOP_RAYS)
+
+def queen_attacks(sq, occupied):
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+def to_coords(bb):
+    """Converts a bitboard into a list of (row, col) tuples."""
+    coords = []
+    while bb:
+        low = bb & -bb
+        coords.append(divmod(low.bit_length() - 1, 8))
+        bb ^= low
+    return coords
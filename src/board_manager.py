@@ -1,40 +1,260 @@
+from array import array
 import state
-from models import ChessPiece
+import zobrist
+from models import ChessPiece, CODE_NAMES, KING, piece_code
+from move_physics import attackers_to
+
+def set_square(row, col, piece):
+    """Writes a piece (or None) to a square and keeps the bitboards and piece lists in sync."""
+    sq = row * 8 + col
+    bit = 1 << sq
+    old = state.square_pieces[sq]
+    if old:
+        state.zobrist_key ^= zobrist.PIECE_KEYS[(old.color, old.type)][sq]
+        state.piece_bitboards[(old.color, old.type)] &= ~bit
+        state.color_bitboards[old.color] &= ~bit
+        del state.piece_lists[old.color][(row, col)]
+        if old.kind == KING and state.king_squares[old.color] == (row, col):
+            state.king_squares[old.color] = None
+    if piece:
+        state.zobrist_key ^= zobrist.PIECE_KEYS[(piece.color, piece.type)][sq]
+        state.piece_bitboards[(piece.color, piece.type)] |= bit
+        state.color_bitboards[piece.color] |= bit
+        state.piece_lists[piece.color][(row, col)] = piece
+        if piece.kind == KING:
+            state.king_squares[piece.color] = (row, col)
+        state.squares[sq] = piece.code
+    else:
+        state.squares[sq] = 0
+    state.square_pieces[sq] = piece
+
+def rebuild_board_indexes():
+    """Recomputes the codes, bitboards, piece lists, king squares and Zobrist key from square_pieces."""
+    for key in state.piece_bitboards:
+        state.piece_bitboards[key] = 0
+    state.color_bitboards['white'] = state.color_bitboards['black'] = 0
+    state.piece_lists['white'].clear()
+    state.piece_lists['black'].clear()
+    state.king_squares['white'] = state.king_squares['black'] = None
+    for sq, p in enumerate(state.square_pieces):
+        state.squares[sq] = p.code if p else 0
+        if p:
+            bit = 1 << sq
+            r, c = divmod(sq, 8)
+            state.piece_bitboards[(p.color, p.type)] |= bit
+            state.color_bitboards[p.color] |= bit
+            state.piece_lists[p.color][(r, c)] = p
+            if p.kind == KING:
+                state.king_squares[p.color] = (r, c)
+    state.zobrist_key = compute_zobrist_key()
+
+def castling_rights():
+    """Current castling rights in FEN order (e.g. 'KQkq'), derived from the has_moved flags."""
+    rights = ""
+    for flag, row, rook_col in (('K', 7, 7), ('Q', 7, 0), ('k', 0, 7), ('q', 0, 0)):
+        color = 'white' if row == 7 else 'black'
+        king, rook = state.square_pieces[row * 8 + 4], state.square_pieces[row * 8 + rook_col]
+        if (king and king.type == 'king' and king.color == color and not king.has_moved
+                and rook and rook.type == 'rook' and rook.color == color and not rook.has_moved):
+            rights += flag
+    return rights
+
+def compute_zobrist_key():
+    """Zobrist key of the current position computed from scratch (the incremental key's reference)."""
+    key = 0
+    for color in ('white', 'black'):
+        for (r, c), p in state.piece_lists[color].items():
+            key ^= zobrist.PIECE_KEYS[(p.color, p.type)][r * 8 + c]
+    if state.current_turn_color == 'black':
+        key ^= zobrist.BLACK_TO_MOVE_KEY
+    key ^= zobrist.castling_key(castling_rights())
+    key ^= zobrist.en_passant_key(state.pawn_en_passant_target)
+    return key
+
+def position_key():
+    """Canonical cache key for the current position: its 64-bit Zobrist key.
+
+    Covers placement, side to move, castling rights and the en passant file; use it for
+    evaluation caches, legal-move caches and repetition detection.
+    """
+    return state.zobrist_key
+
+def verify_board_indexes():
+    """Debug check: raises AssertionError if the bitboards or piece lists disagree with the board."""
+    problems = []
+    for r in range(8):
+        for c in range(8):
+            p = state.square_pieces[r * 8 + c]
+            bit = 1 << (r * 8 + c)
+            if state.squares[r * 8 + c] != (p.code if p else 0):
+                problems.append(f"square code {(r, c)}: {state.squares[r * 8 + c]}")
+            for color in ('white', 'black'):
+                listed = state.piece_lists[color].get((r, c))
+                expected = p if p and p.color == color else None
+                if listed is not expected:
+                    problems.append(f"piece list {color} {(r, c)}: {listed} != {expected}")
+                if bool(state.color_bitboards[color] & bit) != (expected is not None):
+                    problems.append(f"color bitboard {color} {(r, c)}")
+            for key, bb in state.piece_bitboards.items():
+                if bool(bb & bit) != bool(p and (p.color, p.type) == key):
+                    problems.append(f"piece bitboard {key} {(r, c)}")
+    for color in ('white', 'black'):
+        kings = [sq for sq, p in state.piece_lists[color].items() if p.type == 'king']
+        if state.king_squares[color] != (kings[0] if kings else None):
+            problems.append(f"king square {color}: {state.king_squares[color]} != {kings}")
+    if state.zobrist_key != compute_zobrist_key():
+        problems.append(f"zobrist key {state.zobrist_key:016x} != {compute_zobrist_key():016x}")
+    if problems:
+        raise AssertionError("Board indexes out of sync: " + "; ".join(problems[:5]))
+
+BACK_RANK = ('rook', 'knight', 'bishop', 'queen', 'king', 'bishop', 'knight', 'rook')
 
 def initialize_game_board():
     """Starts a new game by placing all 32 pieces in their standard positions."""
     # Reset timers and log
     state.white_time = state.timer_initial_seconds
     state.black_time = state.timer_initial_seconds
-    state.game_move_log = []
-    state.move_history = []
+    state.current_turn_color = 'white'
+    state.pawn_en_passant_target = None
 
-    # Reset board to all empty squares first
-    for r in range(8):
-        for c in range(8):
-            state.board[r][c] = None
-
-    # Place Pawns
+    # Reset board to all empty squares first, then place Pawns and the back ranks
+    # (row 0 = Black's back rank, row 7 = White's)
+    state.square_pieces[:] = [None] * 64
     for col in range(8):
-        state.board[1][col] = ChessPiece('black', 'pawn', 'src/images/black_pawn.png')
-        state.board[6][col] = ChessPiece('white', 'pawn', 'src/images/white_pawn.png')
+        state.square_pieces[col] = ChessPiece('black', BACK_RANK[col])
+        state.square_pieces[8 + col] = ChessPiece('black', 'pawn')
+        state.square_pieces[48 + col] = ChessPiece('white', 'pawn')
+        state.square_pieces[56 + col] = ChessPiece('white', BACK_RANK[col])
+
+    rebuild_board_indexes()
+    state.halfmove_clock = 0
+    state.fullmove_number = 1
+    reset_history()
+
+FEN_PIECE_TYPES = {'p': 'pawn', 'n': 'knight', 'b': 'bishop', 'r': 'rook', 'q': 'queen', 'k': 'king'}
+# FEN letter -> piece code ('P' -> white pawn, 'p' -> black pawn, ...)
+FEN_PIECE_CODES = {(letter.upper() if color == 'white' else letter): piece_code(color, type_name)
+                   for letter, type_name in FEN_PIECE_TYPES.items() for color in ('white', 'black')}
+
+def _load_position(codes, side, castling, en_passant, halfmove_clock, fullmove_number):
+    """Rebuilds the position from 64 piece codes plus the non-placement state."""
+    state.square_pieces[:] = [None] * 64
+    for sq, code in enumerate(codes):
+        if code:
+            piece = ChessPiece(*CODE_NAMES[code])
+            # Castling rights are tracked through has_moved, so only pieces named
+            # by the castling rights below count as unmoved
+            piece.has_moved = True
+            state.square_pieces[sq] = piece
+
+    state.current_turn_color = side
+    for flag, row, rook_col in (('K', 7, 7), ('Q', 7, 0), ('k', 0, 7), ('q', 0, 0)):
+        king, rook = state.square_pieces[row * 8 + 4], state.square_pieces[row * 8 + rook_col]
+        if flag in castling and king and king.type == 'king' and rook and rook.type == 'rook':
+            king.has_moved = False
+            rook.has_moved = False
+
+    state.pawn_en_passant_target = en_passant
+    state.halfmove_clock = halfmove_clock
+    state.fullmove_number = fullmove_number
+    rebuild_board_indexes()
+
+def parse_fen(fen):
+    """Parses a FEN string without touching the board.
+
+    Returns (codes, side, castling, en_passant, halfmove_clock, fullmove_number), where codes
+    is a 64-byte bytearray of piece codes. Missing trailing fields get their usual defaults.
+    Raises ValueError for malformed input, and for positions the rules engine can't play:
+    not exactly one king per side, the side not to move in check, an en passant square on
+    the wrong rank for the side to move, or negative move counters.
+    """
+    parts = fen.split()
+    if not parts:
+        raise ValueError("Empty FEN")
+    ranks = parts[0].split('/')
+    if len(ranks) != 8:
+        raise ValueError(f"Invalid FEN placement: {parts[0]}")
+
+    codes = bytearray(64)
+    for r, rank in enumerate(ranks):
+        c = 0
+        for ch in rank:
+            if '1' <= ch <= '8':
+                c += ord(ch) - 48
+            else:
+                code = FEN_PIECE_CODES.get(ch)
+                if code is None or c > 7:
+                    raise ValueError(f"Invalid FEN rank: {rank}")
+                codes[r * 8 + c] = code
+                c += 1
+        if c != 8:
+            raise ValueError(f"Invalid FEN rank: {rank}")
+    for color in ('white', 'black'):
+        kings = codes.count(piece_code(color, 'king'))
+        if kings != 1:
+            raise ValueError(f"Invalid FEN placement: {kings} {color} kings")
+
+    side = parts[1] if len(parts) > 1 else 'w'
+    if side not in ('w', 'b'):
+        raise ValueError(f"Invalid FEN side to move: {side}")
+    castling = parts[2] if len(parts) > 2 else '-'
+    if castling != '-' and not set(castling) <= set('KQkq'):
+        raise ValueError(f"Invalid FEN castling field: {castling}")
+    ep = parts[3] if len(parts) > 3 else '-'
+    if ep == '-':
+        en_passant = None
+    elif len(ep) == 2 and 'a' <= ep[0] <= 'h' and ep[1] == ('6' if side == 'w' else '3'):
+        en_passant = (8 - int(ep[1]), ord(ep[0]) - ord('a'))
+    else:
+        raise ValueError(f"Invalid FEN en passant square: {ep}")
+    try:
+        halfmove_clock = int(parts[4]) if len(parts) > 4 else 0
+        fullmove_number = int(parts[5]) if len(parts) > 5 else 1
+    except ValueError:
+        raise ValueError(f"Invalid FEN move counters: {' '.join(parts[4:6])}")
+    if halfmove_clock < 0 or fullmove_number < 0:
+        raise ValueError(f"Invalid FEN move counters: {' '.join(parts[4:6])}")
+    side = 'white' if side == 'w' else 'black'
+    if _king_attacked(codes, 'black' if side == 'white' else 'white'):
+        raise ValueError("Invalid FEN: the side not to move is in check")
+    return codes, side, castling, en_passant, halfmove_clock, max(1, fullmove_number)
+
+def _king_attacked(codes, color):
+    """True if `color`'s king is attacked in the placement `codes` (board left untouched)."""
+    bitboards = {CODE_NAMES[code]: 0 for code in CODE_NAMES}
+    occupied = 0
+    for sq, code in enumerate(codes):
+        if code:
+            bitboards[CODE_NAMES[code]] |= 1 << sq
+            occupied |= 1 << sq
+    king_sq = codes.index(piece_code(color, 'king'))
+    enemy_color = 'black' if color == 'white' else 'white'
+    return bool(attackers_to(king_sq, enemy_color, occupied, piece_bitboards=bitboards))
 
-    # Place Rooks
-    state.board[0][0] = state.board[0][7] = ChessPiece('black', 'rook', 'src/images/black_rook.png')
-    state.board[7][0] = state.board[7][7] = ChessPiece('white', 'rook', 'src/images/white_rook.png')
+def load_fen(fen):
+    """Sets up the whole position (placement, side, castling, en passant, move counters) from a FEN string."""
+    _load_position(*parse_fen(fen))
+    reset_history()
 
-    # Place Knights
-    state.board[0][1] = state.board[0][6] = ChessPiece('black', 'knight', 'src/images/black_knight.png')
-    state.board[7][1] = state.board[7][6] = ChessPiece('white', 'knight', 'src/images/white_knight.png')
+def reset_history():
+    """Starts a fresh move/undo history with the current position as its first entry."""
+    state.move_history = array('H')
+    state.undo_history = array('I')
+    state.position_history = [position_key()]
+    state.removed_pieces = []
+    state.history_start = (state.fullmove_number, state.current_turn_color)
 
-    # Place Bishops
-    state.board[0][2] = state.board[0][5] = ChessPiece('black', 'bishop', 'src/images/black_bishop.png')
-    state.board[7][2] = state.board[7][5] = ChessPiece('white', 'bishop', 'src/images/white_bishop.png')
+# --- Position Snapshots ---
+def snapshot_position():
+    """Compact, immutable copy of the current position.
 
-    # Place Queens
-    state.board[0][3] = ChessPiece('black', 'queen', 'src/images/black_queen.png')
-    state.board[7][3] = ChessPiece('white', 'queen', 'src/images/white_queen.png')
+    The placement is a 64-byte copy of state.squares; the rest is the side to move,
+    castling rights, en passant target, move counters and Zobrist key.
+    """
+    return (bytes(state.squares), state.current_turn_color, castling_rights(),
+            state.pawn_en_passant_target, state.halfmove_clock, state.fullmove_number, state.zobrist_key)
 
-    # Place Kings
-    state.board[0][4] = ChessPiece('black', 'king', 'src/images/black_king.png')
-    state.board[7][4] = ChessPiece('white', 'king', 'src/images/white_king.png')
+def restore_position(snapshot):
+    """Puts a snapshot_position() result back on the board, starting a fresh history from it."""
+    _load_position(*snapshot[:6])
+    reset_history()
@@ -0,0 +1,249 @@
+"""Coach commentary service: cached, deduplicated and rate-limited LLM requests.
+
+A request is keyed by (position, best move, eval bucket, alternative moves), so asking again about the same
+position and advice (e.g. pressing GET HINT twice) is answered from the cache, and a
+request identical to one still running waits for that one instead of calling the model
+again. Backend calls run on a small fixed pool of worker threads and are spaced out by a
+token-bucket rate limiter.
+
+Backends are plain objects with `generate(fen, best_move, evaluation, alternatives) -> str`,
+where `alternatives` is a sequence of (move, evaluation) pairs for the runner-up moves:
+GeminiBackend loads google.generativeai on first use; StubBackend answers locally and
+deterministically, for offline use and for benchmarking:
+
+    python coach.py --bench 200
+"""
+import os
+import sys
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from analysis_cache import position_key_from_fen
+
+logger = logging.getLogger(__name__)
+
+COACH_WORKERS = int(os.getenv("COACH_WORKERS", "2"))
+COACH_RATE_PER_MINUTE = float(os.getenv("COACH_RATE_PER_MINUTE", "30"))
+COACH_CACHE_SIZE = 512
+EVAL_BUCKET_PAWNS = 0.5  # Evals within the same half pawn get the same commentary
+
+def eval_bucket(evaluation):
+    """Coarse key for an eval string: ('cp', half-pawn bucket) or ('mate', side)."""
+    text = str(evaluation)
+    if text.startswith("Mate"):
+        return ('mate', '-' in text)
+    try:
+        return ('cp', round(float(text) / EVAL_BUCKET_PAWNS))
+    except ValueError:
+        return ('other', text)
+
+def build_prompt(fen, best_move, evaluation, alternatives=()):
+    others = ", ".join(f"{move} ({score})" for move, score in alternatives)
+    if not others:
+        return f"""
+        You are a Grandmaster Chess Coach.
+        Current Board (FEN): {fen}
+        Stockfish Evaluation: {evaluation}
+        Best Move (UCI): {best_move}
+
+        Provide a concise (maximum 2 sentences) explanation of why this move is good or
+        what the strategic goal is. Speak like a helpful mentor.
+        """
+    return f"""
+        You are a Grandmaster Chess Coach.
+        Current Board (FEN): {fen}
+        Stockfish Evaluation: {evaluation}
+        Best Move (UCI): {best_move}
+        Other Candidate Moves (UCI, evaluation): {others}
+
+        Provide a concise (maximum 2 sentences) explanation of why the best move is good or
+        what the strategic goal is, and what it offers over the other candidates. Speak like
+        a helpful mentor.
+        """
+
+# --- Backends ---
+class GeminiBackend:
+    """Gemini through google.generativeai. The library is heavy to import, so it is loaded and the
+    client configured on the first request (on a coach worker), not when the app starts."""
+    name = "gemini"
+    MODELS = ('gemini-3-flash-preview', 'gemini-pro')  # Preferred first
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.model = None
+        self._lock = threading.Lock()
+
+    def _load_model(self):
+        with self._lock:
+            if self.model is None:
+                started = time.perf_counter()
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                for model_name in self.MODELS:
+                    try:
+                        self.model = genai.GenerativeModel(model_name)
+                        break
+                    except Exception as e:
+                        logger.error(f"Gemini model load error: {e}")
+                        print(f"--- Gemini model {model_name} error, trying fallback... ---")
+                else:
+                    raise RuntimeError("no Gemini model could be loaded")
+                print(f"--- Gemini loaded with model: {model_name} "
+                      f"({(time.perf_counter() - started) * 1000:.0f} ms) ---")
+            return self.model
+
+    def generate(self, fen, best_move, evaluation, alternatives=()):
+        prompt = build_prompt(fen, best_move, evaluation, alternatives)
+        return self._load_model().generate_content(prompt).text.strip()
+
+class StubBackend:
+    """Local stand-in: the same input always gives the same text, after `latency_ms`."""
+    name = "stub"
+    TEMPLATES = (
+        "{move} improves your position; the evaluation is {eval}.",
+        "Play {move}: it keeps your pieces active and the evaluation at {eval}.",
+        "{move} is the most purposeful move here, holding the balance at {eval}.",
+    )
+
+    def __init__(self, latency_ms=0):
+        self.latency_ms = latency_ms
+
+    def generate(self, fen, best_move, evaluation, alternatives=()):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        digest = hashlib.sha1(f"{fen}|{best_move}".encode()).digest()
+        text = self.TEMPLATES[digest[0] % len(self.TEMPLATES)].format(move=best_move.upper(), eval=evaluation)
+        if alternatives:
+            move, score = alternatives[0]
+            text += f" {move.upper()} ({score}) is the next best try."
+        return text
+
+# --- Service ---
+class RateLimiter:
+    """Token bucket: at most `per_minute` calls per minute, with bursts up to `burst`."""
+    def __init__(self, per_minute, burst=2):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until a call is allowed; returns the seconds spent waiting."""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) / self.interval)
+            self._last = now
+            self._tokens -= 1
+            delay = -self._tokens * self.interval if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+        return delay
+
+class CoachService:
+    def __init__(self, backend, workers=COACH_WORKERS, rate_per_minute=COACH_RATE_PER_MINUTE,
+                 cache_size=COACH_CACHE_SIZE):
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # key -> commentary, most recently used last
+        self._inflight = {}           # key -> callbacks waiting for the running request
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="coach")
+        self._limiter = RateLimiter(rate_per_minute)
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'backend_calls': 0,
+                      'errors': 0, 'backend_ms': 0, 'rate_limited_ms': 0}
+
+    def request(self, fen, best_move, evaluation, callback, alternatives=()):
+        """Calls `callback(text, ok)` with commentary, right away from the cache or later from a
+        worker thread. A failed backend call passes the error text with ok=False."""
+        alternatives = tuple(alternatives)
+        key = (position_key_from_fen(fen), best_move, eval_bucket(evaluation),
+               tuple(move for move, _ in alternatives))
+        with self._lock:
+            self.stats['requests'] += 1
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+            elif key in self._inflight:
+                self.stats['coalesced'] += 1
+                self._inflight[key].append(callback)
+                return
+            else:
+                self._inflight[key] = [callback]
+        if text is not None:
+            callback(text, True)
+            return
+        self._executor.submit(self._run, key, fen, best_move, evaluation, alternatives)
+
+    def _run(self, key, fen, best_move, evaluation, alternatives):
+        waited = self._limiter.wait()
+        started = time.perf_counter()
+        try:
+            text, ok = self.backend.generate(fen, best_move, evaluation, alternatives), True
+        except Exception as e:
+            logger.error(f"Coach backend error: {e}")
+            text, ok = str(e), False
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        with self._lock:
+            self.stats['backend_calls'] += 1
+            self.stats['backend_ms'] += elapsed_ms
+            self.stats['rate_limited_ms'] += int(waited * 1000)
+            if ok:
+                self._cache[key] = text
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            else:
+                self.stats['errors'] += 1
+            callbacks = self._inflight.pop(key, [])
+        for callback in callbacks:
+            try:
+                callback(text, ok)
+            except Exception as e:
+                logger.error(f"Coach callback error: {e}")
+
+    def summary(self):
+        with self._lock:
+            calls = self.stats['backend_calls']
+            return {**self.stats, 'backend': self.backend.name,
+                    'hit_rate': self.stats['cache_hits'] / self.stats['requests'] if self.stats['requests'] else 0.0,
+                    'avg_backend_ms': self.stats['backend_ms'] // calls if calls else 0}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# --- Benchmark ---
+def run_bench(count, latency_ms=50, workers=COACH_WORKERS, distinct=20):
+    """Fires `count` requests for `distinct` different hints at a stub backend, twice: the first
+    round shows coalescing, the second the cache. Reports latency and throughput per round."""
+    service = CoachService(StubBackend(latency_ms), workers=workers, rate_per_minute=0)
+    fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+    moves = [f"{'abcdefgh'[i % 8]}2{'abcdefgh'[i // 8 % 8]}4" for i in range(distinct)]
+    for round_name in ("cold", "warm"):
+        done = threading.Semaphore(0)
+        start = time.perf_counter()
+        for i in range(count):
+            service.request(fen, moves[i % distinct], "+0.3", lambda text, ok: done.release())
+        for _ in range(count):
+            done.acquire()
+        elapsed = time.perf_counter() - start
+        stats = service.summary()
+        print(f"{round_name}: {count} requests in {elapsed * 1000:.0f} ms ({count / elapsed:.0f}/s) | "
+              f"backend calls {stats['backend_calls']}, cache hits {stats['cache_hits']}, "
+              f"coalesced {stats['coalesced']}, avg backend {stats['avg_backend_ms']} ms")
+    service.close()
+    return stats
+
+def main(argv):
+    if len(argv) > 1 and argv[1] == '--bench':
+        run_bench(int(argv[2]) if len(argv) > 2 else 200)
+    else:
+        print("usage: coach.py --bench [requests]")
+
+if __name__ == '__main__':
+    main(sys.argv)
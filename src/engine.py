@@ -1,9 +1,12 @@
-import threading
 import state
 import models
+from models import PAWN, ROOK, KING
+import board_manager
+import zobrist
 import game_status
+import move_logic
 import uci_utils
-from ai_interface import get_evaluation_and_move
+import move_codec
 
 # Forward declaration for ai_agent trigger
 _ai_agent_module = None
@@ -12,104 +15,219 @@ def set_ai_agent_module(mod):
     global _ai_agent_module
     _ai_agent_module = mod
 
-def execute_move(target_row, target_col):
-    """Applies a move to the board, handling captures and special side effects."""
-    moving_piece = state.active_selected_piece
-    if moving_piece is None or state.active_selected_pos is None:
-        return
+def make_move(start_pos, end_pos, promotion='queen'):
+    """Applies a move to the board and returns (packed_move, undo_info) to take it back.
 
-    # --- Execute the Move ---
-    start_row, start_col = state.active_selected_pos
-    captured_piece = state.board[target_row][target_col]
+    Only the rules are applied here (captures, castling, en passant, promotion, turn switch);
+    logging, evaluation and AI triggers live in execute_move(). See move_codec for the encodings.
+    """
+    start_row, start_col = start_pos
+    target_row, target_col = end_pos
+    from_sq = start_row * 8 + start_col
+    to_sq = target_row * 8 + target_col
+    moving_piece = state.square_pieces[from_sq]
+    captured_piece = state.square_pieces[to_sq]
     prev_en_passant = state.pawn_en_passant_target
-    is_en_passant = False
-    is_castle_move = False
-    rook_move_info = None
+    prev_halfmove_clock = state.halfmove_clock
+    # Only king or rook moves (or a rook being captured) can change castling rights
+    touches_castling = (moving_piece.kind == KING or moving_piece.kind == ROOK
+                        or (captured_piece is not None and captured_piece.kind == ROOK))
+    prev_castling = board_manager.castling_rights() if touches_castling else None
+    piece_had_moved = moving_piece.has_moved
+    rook_had_moved = False
+    flag = move_codec.FLAG_NORMAL
 
     # --- Side Effect: Castling ---
-    if moving_piece.type == 'king' and abs(target_col - start_col) == 2:
-        is_castle_move = True
+    if moving_piece.kind == KING and abs(target_col - start_col) == 2:
+        flag = move_codec.FLAG_CASTLE
         old_rook_col = 7 if target_col == 6 else 0
         new_rook_col = 5 if target_col == 6 else 3
-        rook = state.board[target_row][old_rook_col]
-        rook_move_info = (rook, (target_row, old_rook_col), (target_row, new_rook_col))
-        
-        state.board[target_row][new_rook_col] = state.board[target_row][old_rook_col]
-        state.board[target_row][old_rook_col] = None
+        rook = state.square_pieces[target_row * 8 + old_rook_col]
+
+        board_manager.set_square(target_row, new_rook_col, rook)
+        board_manager.set_square(target_row, old_rook_col, None)
         if rook:
+            rook_had_moved = rook.has_moved
             rook.has_moved = True
 
     # --- Side Effect: En Passant Capture ---
-    if moving_piece.type == 'pawn' and (target_row, target_col) == state.pawn_en_passant_target:
-        is_en_passant = True
-        captured_piece = state.board[start_row][target_col] # The captured pawn
-        state.board[start_row][target_col] = None
+    if moving_piece.kind == PAWN and (target_row, target_col) == state.pawn_en_passant_target:
+        flag = move_codec.FLAG_EN_PASSANT
+        captured_piece = state.square_pieces[start_row * 8 + target_col] # The captured pawn
+        board_manager.set_square(start_row, target_col, None)
 
     # --- Setup next turn's En Passant state ---
     state.pawn_en_passant_target = None
-    if moving_piece.type == 'pawn' and abs(target_row - start_row) == 2:
+    if moving_piece.kind == PAWN and abs(target_row - start_row) == 2:
         state.pawn_en_passant_target = ((target_row + start_row) // 2, start_col)
 
     # --- Finalize the Move ---
-    state.board[target_row][target_col] = moving_piece
-    state.board[start_row][start_col] = None
+    board_manager.set_square(target_row, target_col, moving_piece)
+    board_manager.set_square(start_row, start_col, None)
     moving_piece.has_moved = True
+    # Kept so unmake_move() puts the same objects back, not lookalikes
+    if captured_piece:
+        state.removed_pieces.append(captured_piece)
+
+    # --- Promotion (the UI always picks a Queen) ---
+    if moving_piece.kind == PAWN and (target_row == 0 or target_row == 7):
+        flag = move_codec.FLAG_PROMOTION
+        state.removed_pieces.append(moving_piece)
+        board_manager.set_square(target_row, target_col, models.ChessPiece(moving_piece.color, promotion))
 
-    # --- Auto-Promotion to Queen ---
-    promoted_from = None
-    is_promo = False
-    if moving_piece.type == 'pawn' and (target_row == 0 or target_row == 7):
-        is_promo = True
-        promoted_from = moving_piece
-        p_color = moving_piece.color
-        state.board[target_row][target_col] = models.ChessPiece(p_color, 'queen', f'src/images/{p_color}_queen.png')
-
-    # --- Store Move for Undo ---
-    move_rec = models.MoveRecord(
-        (start_row, start_col), (target_row, target_col), 
-        state.board[target_row][target_col], # Could be promoted piece
-        captured_piece, 
-        prev_en_passant,
-        is_en_passant=is_en_passant,
-        is_castle=is_castle_move,
-        rook_move=rook_move_info,
-        is_promotion=is_promo,
-        promoted_from=promoted_from
-    )
-    state.move_history.append(move_rec)
-
-    # --- Log to Game Move Log ---
-    move_count = (len(state.move_history) + 1) // 2
-    color_name = "White" if state.current_turn_color == "white" else "Black"
-    
-    def get_coord_str(r, c):
-        return f"{chr(ord('a') + c)}{8 - r}"
-
-    s_str = get_coord_str(start_row, start_col)
-    e_str = get_coord_str(target_row, target_col)
-    log_entry = f"Move {move_count} {color_name}: {s_str.upper()} - {e_str.upper()}"
-    state.game_move_log.append(log_entry)
-
-    # Switch turns
+    # Fifty-move rule counter: reset by any pawn move or capture
+    if moving_piece.kind == PAWN or captured_piece:
+        state.halfmove_clock = 0
+    else:
+        state.halfmove_clock += 1
+
+    # Switch turns (the move number advances once Black has moved)
+    if state.current_turn_color == 'black':
+        state.fullmove_number += 1
     state.current_turn_color = 'black' if state.current_turn_color == 'white' else 'white'
-    
+
+    # Zobrist: pieces were already hashed by set_square(); fold in side, en passant and castling
+    state.zobrist_key ^= (zobrist.BLACK_TO_MOVE_KEY
+                          ^ zobrist.en_passant_key(prev_en_passant)
+                          ^ zobrist.en_passant_key(state.pawn_en_passant_target))
+    if touches_castling:
+        state.zobrist_key ^= zobrist.castling_key(prev_castling) ^ zobrist.castling_key(board_manager.castling_rights())
+    state.position_history.append(state.zobrist_key)
+
+    undo = move_codec.encode_undo(
+        captured_piece.code if captured_piece else 0,
+        captured_piece.has_moved if captured_piece else False,
+        piece_had_moved, rook_had_moved, prev_en_passant, prev_halfmove_clock)
+    return move_codec.encode_move(from_sq, to_sq, flag, promotion), undo
+
+def _take_removed_piece(code):
+    """The piece object make_move() took off the board, or a new one with `code` if the
+    stack doesn't match (e.g. a record unmade after the history was reset)."""
+    if state.removed_pieces and state.removed_pieces[-1].code == code:
+        return state.removed_pieces.pop()
+    return models.ChessPiece(*models.CODE_NAMES[code])
+
+def unmake_move(record):
+    """Reverses a (packed_move, undo_info) pair returned by make_move(), restoring the exact previous position."""
+    move, undo = record
+    from_sq, to_sq, flag = move_codec.move_from(move), move_codec.move_to(move), move_codec.move_flag(move)
+    selected_row, selected_col = divmod(from_sq, 8)
+    target_row, target_col = divmod(to_sq, 8)
+    captured_code, captured_had_moved, piece_had_moved, rook_had_moved, ep_file, prev_halfmove_clock = \
+        move_codec.decode_undo(undo)
+
+    # Restore piece position (a promoted piece turns back into its pawn)
+    original_piece = state.square_pieces[to_sq]
+    if flag == move_codec.FLAG_PROMOTION:
+        original_piece = _take_removed_piece(models.piece_code(original_piece.color, 'pawn'))
+    captured_piece = None
+    if captured_code:
+        captured_piece = _take_removed_piece(captured_code)
+        captured_piece.has_moved = captured_had_moved
+    board_manager.set_square(selected_row, selected_col, original_piece)
+    board_manager.set_square(target_row, target_col, captured_piece)
+    original_piece.has_moved = piece_had_moved
+
+    # Restore En Passant capture
+    if flag == move_codec.FLAG_EN_PASSANT:
+        # The captured pawn was at (selected_row, target_col)
+        board_manager.set_square(target_row, target_col, None)
+        board_manager.set_square(selected_row, target_col, captured_piece)
+
+    # Restore Castling Rook
+    if flag == move_codec.FLAG_CASTLE:
+        old_rook_col = 7 if target_col == 6 else 0
+        new_rook_col = 5 if target_col == 6 else 3
+        rook = state.square_pieces[target_row * 8 + new_rook_col]
+        board_manager.set_square(target_row, new_rook_col, None)
+        board_manager.set_square(target_row, old_rook_col, rook)
+        if rook:
+            rook.has_moved = rook_had_moved
+
+    # Restore global state. The mover's previous en passant target sits on the opponent's third rank.
+    state.current_turn_color = 'white' if state.current_turn_color == 'black' else 'black'
+    if state.current_turn_color == 'black':
+        state.fullmove_number -= 1
+    if ep_file is None:
+        state.pawn_en_passant_target = None
+    else:
+        state.pawn_en_passant_target = (2 if state.current_turn_color == 'white' else 5, ep_file)
+    state.halfmove_clock = prev_halfmove_clock
+    state.position_history.pop()
+    state.zobrist_key = state.position_history[-1]
+
+def execute_move(target_row, target_col):
+    """Applies a move to the board, handling captures and special side effects."""
+    moving_piece = state.active_selected_piece
+    if moving_piece is None or state.active_selected_pos is None:
+        return
+
+    # --- Execute the Move ---
+    start_row, start_col = state.active_selected_pos
+    move, undo = make_move((start_row, start_col), (target_row, target_col))
+    move_logic.invalidate_legal_move_cache()
+    uci_utils.invalidate_fen_cache()
+
+    # --- Store Move for Undo (the history panel formats it lazily) ---
+    state.move_history.append(move)
+    state.undo_history.append(undo)
+    if state.debug_consistency_checks:
+        board_manager.verify_board_indexes()
+
+    # --- Clock Increment (for the side that just moved) ---
+    if state.timer_active and state.timer_increment_seconds:
+        if state.current_turn_color == 'black':
+            state.white_time += state.timer_increment_seconds
+        else:
+            state.black_time += state.timer_increment_seconds
+
     # Update Board Evaluation (Live)
-    def update_eval():
-        _, eval_val = get_evaluation_and_move(uci_utils.generate_fen())
-        state.ai_eval_score = eval_val
+    schedule_eval()
 
-    threading.Thread(target=update_eval, daemon=True).start()
+    # Check for Checkmate, Stalemate or a Draw (one pass, cached per position)
+    status = game_status.evaluate_position()
+    if status == game_status.CHECKMATE:
+        print(f"CHECKMATE! {state.current_turn_color.upper()} player has lost.")
+    elif status == game_status.STALEMATE:
+        print("STALEMATE! The game ends in a draw.")
+    elif status in game_status.DRAW_STATUSES:
+        print(f"DRAW by {status.replace('_', ' ')}.")
 
     # Trigger AI if enabled
-    if state.ai_opponent_enabled and state.current_turn_color == 'black':
+    if state.ai_opponent_enabled and state.current_turn_color == 'black' and not game_status.is_game_over(status):
         if _ai_agent_module:
             _ai_agent_module.perform_ai_turn()
+    elif _ai_agent_module and game_status.is_game_over(status):
+        _ai_agent_module.cancel_ponder()  # No reply left to ponder
 
-    # Check for Checkmate or Stalemate
-    if game_status.is_checkmate(state.current_turn_color):
-        print(f"CHECKMATE! {state.current_turn_color.upper()} player has lost.")
-    elif game_status.is_stalemate(state.current_turn_color):
-        print("STALEMATE! The game ends in a draw.")
+# --- Live Evaluation ---
+# Only the newest position is ever evaluated and shown (see analysis_scheduler.py)
+_eval_scheduler = None
+
+def schedule_eval():
+    """Queues a background evaluation of the current position for the eval bar."""
+    global _eval_scheduler
+    # Imported here so the rules core (and the native engine process) never starts the AI services
+    from ai_interface import analyse, format_score
+    from engine_pool import PRIORITY_EVAL
+    from analysis_scheduler import LatestWinsScheduler
+    if _eval_scheduler is None:
+        _eval_scheduler = LatestWinsScheduler(lambda fen, token: analyse(fen, PRIORITY_EVAL, token=token),
+                                              current_key=board_manager.position_key, name="eval")
+
+    def show(result):
+        state.ai_eval_score = format_score(result['score']) if result else "Error"
+
+    # The FEN is taken now, on the caller's thread, so it always matches its key
+    _eval_scheduler.submit(board_manager.position_key(), uci_utils.generate_fen(), show)
+
+def cancel_eval():
+    """Stops the live evaluation, e.g. so the bot's own search gets the engine."""
+    if _eval_scheduler:
+        _eval_scheduler.cancel()
+
+def eval_scheduler_stats():
+    return _eval_scheduler.stats if _eval_scheduler else None
 
 def undo_move():
     """Reverses the last move made using the move history stack."""
@@ -117,36 +235,41 @@ def undo_move():
         print("No moves to undo.")
         return
 
-    move = state.move_history.pop()
-    if state.game_move_log:
-        state.game_move_log.pop()
-    selected_row, selected_col = move.start_pos
-    target_row, target_col = move.end_pos
-
-    # Restore piece position
-    state.board[selected_row][selected_col] = move.piece_moved
-    state.board[target_row][target_col] = move.captured_piece
-    move.piece_moved.has_moved = move.piece_moved_had_moved
-
-    # Restore En Passant capture
-    if move.is_en_passant:
-        # The captured pawn was at (selected_row, target_col)
-        state.board[selected_row][target_col] = move.captured_piece
-        state.board[target_row][target_col] = None
+    unmake_move((state.move_history.pop(), state.undo_history.pop()))
+    if _ai_agent_module:
+        _ai_agent_module.cancel_ponder()
+    move_logic.invalidate_legal_move_cache()
+    uci_utils.invalidate_fen_cache()
+    if state.debug_consistency_checks:
+        board_manager.verify_board_indexes()
+    schedule_eval()
+    print(f"Undo successful. Now it's {state.current_turn_color}'s turn.")
 
-    # Restore Castling Rook
-    if move.is_castle:
-        rook, r_start, r_end = move.rook_move
-        state.board[r_start[0]][r_start[1]] = rook
-        state.board[r_end[0]][r_end[1]] = None
-        if rook:
-            rook.has_moved = move.rook_had_moved
+def move_log_entries(limit=None):
+    """Display strings for the last `limit` plies of the game (all by default), built on demand."""
+    count = len(state.move_history)
+    first = 0 if limit is None else max(0, count - limit)
+    entries = []
+    # Numbered from where the history starts, which after load_fen() can be any move and side
+    start_number, start_color = state.history_start
+    offset = 0 if start_color == 'white' else 1
+    for ply in range(first, count):
+        number, black = divmod(ply + offset, 2)
+        color = 'Black' if black else 'White'
+        entries.append(move_codec.describe_move(state.move_history[ply], start_number + number, color))
+    return entries
 
-    # Restore Promotion
-    if move.is_promotion:
-        state.board[selected_row][selected_col] = move.promoted_from
+def history_blob():
+    """The game's moves and undo info as a compact binary blob (see move_codec.pack_history)."""
+    return move_codec.pack_history(state.move_history, state.undo_history)
 
-    # Restore global state
-    state.pawn_en_passant_target = move.prev_en_passant
-    state.current_turn_color = 'white' if state.current_turn_color == 'black' else 'black'
-    print(f"Undo successful. Now it's {state.current_turn_color}'s turn.")
+def replay_history(blob):
+    """Plays the moves of a history_blob() from the current position, rebuilding the undo stack."""
+    moves, _ = move_codec.unpack_history(blob)
+    for move in moves:
+        from_sq, to_sq = move_codec.move_from(move), move_codec.move_to(move)
+        packed, undo = make_move(divmod(from_sq, 8), divmod(to_sq, 8), move_codec.move_promotion(move) or 'queen')
+        state.move_history.append(packed)
+        state.undo_history.append(undo)
+    move_logic.invalidate_legal_move_cache()
+    uci_utils.invalidate_fen_cache()
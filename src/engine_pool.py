@@ -0,0 +1,170 @@
+"""A fixed-size pool of chess engine processes shared by the bot, hints and live evaluation.
+
+Callers check an engine out, use it exclusively, and give it back. When every engine is
+busy, waiting requests are served by priority (bot move before hint before background
+eval), first come first served within a priority. An engine that fails its health check,
+or that raised while checked out, is closed and replaced by a fresh process.
+
+The pool lives on the engine event loop (see uci_driver.EngineLoop); all methods except
+status() must run there.
+
+    async with pool.checkout(PRIORITY_HINT) as engine:
+        ...  # talk to the engine
+"""
+import heapq
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_BOT = 0
+PRIORITY_HINT = 1
+PRIORITY_EVAL = 2
+PRIORITY_NAMES = {PRIORITY_BOT: 'bot', PRIORITY_HINT: 'hint', PRIORITY_EVAL: 'eval'}
+
+class EnginePoolTimeout(Exception):
+    """No engine became free within the requested timeout."""
+
+class EnginePool:
+    def __init__(self, factory, size, health_check=None, close=None, name="engine"):
+        """`await factory()` starts one engine and returns its handle; `health_check(handle)` returns
+        False for a dead engine; `await close(handle)` shuts one down. Engines start lazily."""
+        self.name = name
+        self.size = size
+        self._factory = factory
+        self._health_check = health_check or (lambda handle: True)
+        self._close = close
+        self._idle = []            # Handles ready for checkout
+        self._started = 0          # Live engines (idle + checked out)
+        self._waiters = []         # Heap of (priority, sequence, future); the future gets a handle or None
+        self._sequence = itertools.count()
+        self._closed = False
+        self.stats = {'checkouts': 0, 'waits': 0, 'restarts': 0, 'failures': 0,
+                      'by_priority': {name: 0 for name in PRIORITY_NAMES.values()}}
+
+    def _count(self, priority, waited):
+        self.stats['checkouts'] += 1
+        self.stats['waits'] += waited
+        by_priority = self.stats['by_priority']
+        label = PRIORITY_NAMES.get(priority, str(priority))
+        by_priority[label] = by_priority.get(label, 0) + 1
+
+    async def _acquire(self, priority, timeout):
+        """A free handle, or None for a free slot to start an engine in."""
+        if self._closed:
+            raise EnginePoolTimeout(f"{self.name} pool is closed")
+        if not self._waiters:
+            if self._idle:
+                self._count(priority, False)
+                return self._idle.pop()
+            if self._started < self.size:
+                self._started += 1
+                self._count(priority, False)
+                return None
+        if timeout is not None and timeout <= 0:
+            raise EnginePoolTimeout(f"no {self.name} free")
+        future = asyncio.get_running_loop().create_future()
+        ticket = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters, ticket)
+        try:
+            handle = await asyncio.wait_for(future, timeout)
+        except BaseException as e:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+            elif future.done() and not future.cancelled():
+                # Cancelled right after being served: pass the engine (or slot) on
+                handle = future.result()
+                if handle is not None:
+                    self.release(handle)
+                elif not self._hand_over(None):
+                    self._started -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                raise EnginePoolTimeout(f"no {self.name} free after {timeout}s") from None
+            raise
+        self._count(priority, True)
+        return handle
+
+    def _hand_over(self, handle):
+        """Gives a free handle (or None = free slot) to the best waiter; False if nobody waits."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(handle)
+                return True
+        return False
+
+    async def _start_engine(self):
+        try:
+            return await self._factory()
+        except Exception:
+            self.stats['failures'] += 1
+            if not self._hand_over(None):
+                self._started -= 1
+            raise
+
+    async def acquire(self, priority=PRIORITY_EVAL, timeout=None):
+        """Checks out a healthy engine, waiting by priority if none is free."""
+        handle = await self._acquire(priority, timeout)
+        if handle is None:
+            return await self._start_engine()
+        if not self._health_check(handle):
+            # Replace it in the same slot so the pool never grows past its size
+            logger.warning(f"{self.name} failed its health check; restarting it")
+            await self._close_quietly(handle)
+            self.stats['restarts'] += 1
+            return await self._start_engine()
+        return handle
+
+    def release(self, handle, healthy=True):
+        """Returns an engine to the pool; an unhealthy one is closed and replaced on next demand."""
+        if not healthy or self._closed:
+            if not healthy:
+                logger.warning(f"{self.name} crashed; a fresh one will be started on demand")
+                self.stats['restarts'] += 1
+            asyncio.get_running_loop().create_task(self._close_quietly(handle))
+            if not self._hand_over(None):
+                self._started -= 1
+            return
+        if not self._hand_over(handle):
+            self._idle.append(handle)
+
+    async def _close_quietly(self, handle):
+        try:
+            if self._close:
+                await self._close(handle)
+        except Exception as e:
+            logger.error(f"Error closing {self.name}: {e}")
+
+    @asynccontextmanager
+    async def checkout(self, priority=PRIORITY_EVAL, timeout=None):
+        """Context manager around acquire()/release(); after an exception the engine is health-checked."""
+        handle = await self.acquire(priority, timeout)
+        healthy = True
+        try:
+            yield handle
+        except BaseException:
+            healthy = self._health_check(handle)
+            raise
+        finally:
+            self.release(handle, healthy)
+
+    async def close(self):
+        """Shuts down every idle engine; engines still checked out are closed when returned."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_exception(EnginePoolTimeout(f"{self.name} pool is closed"))
+        for handle in idle:
+            self._started -= 1
+            await self._close_quietly(handle)
+
+    def status(self):
+        """Snapshot of pool occupancy and counters, e.g. for logging or the UI."""
+        return {'size': self.size, 'started': self._started, 'idle': len(self._idle),
+                'waiting': len(self._waiters), **self.stats}
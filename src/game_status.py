@@ -1,16 +1,90 @@
 import state
+import board_manager
 from move_physics import is_king_in_check
 import move_logic
 
+# --- Position Status Values ---
+ONGOING = 'ongoing'
+CHECK = 'check'
+CHECKMATE = 'checkmate'
+STALEMATE = 'stalemate'
+INSUFFICIENT_MATERIAL = 'insufficient_material'
+THREEFOLD_REPETITION = 'threefold_repetition'
+FIFTY_MOVE_RULE = 'fifty_move_rule'
+DRAW_STATUSES = (INSUFFICIENT_MATERIAL, THREEFOLD_REPETITION, FIFTY_MOVE_RULE)
+
+# Light squares (a8 is light), for the same-colored bishops draw
+LIGHT_SQUARES = sum(1 << (r * 8 + c) for r in range(8) for c in range(8) if (r + c) % 2 == 0)
+
+# Position key -> status that depends only on the position itself (not on the game's history)
+_status_cache = {}
+STATUS_CACHE_LIMIT = 4096
+
 def has_no_legal_moves(color):
     """Determines if the game should end due to lack of valid moves."""
-    for r in range(8):
-        for col in range(8):
-            p = state.board[r][col]
-            if p and p.color == color:
-                if move_logic.get_fully_legal_moves(p, r, col):
-                    return False
-    return True
+    if color == state.current_turn_color:
+        # Shares the cache that piece selection and move dots read from
+        return not move_logic.get_cached_legal_moves()
+    return next(move_logic.iter_legal_moves(color), None) is None
+
+def has_insufficient_material():
+    """True when neither side can possibly mate: K v K, K+minor v K, or only same-colored bishops."""
+    bbs = state.piece_bitboards
+    for color in ('white', 'black'):
+        if bbs[(color, 'pawn')] or bbs[(color, 'rook')] or bbs[(color, 'queen')]:
+            return False
+    knights = bbs[('white', 'knight')] | bbs[('black', 'knight')]
+    bishops = bbs[('white', 'bishop')] | bbs[('black', 'bishop')]
+    minors = knights | bishops
+    if not minors & (minors - 1):
+        return True
+    return not knights and (not bishops & LIGHT_SQUARES or not bishops & ~LIGHT_SQUARES)
+
+def repetition_count():
+    """How many times the current position has occurred in this game."""
+    history = state.position_history
+    if not history:
+        return 1
+    current = history[-1]
+    # Only positions since the last irreversible move can repeat, every second ply
+    window = history[-(state.halfmove_clock + 1):]
+    return window[::-2].count(current)
+
+def evaluate_position():
+    """Classifies the position for the side to move in a single pass.
+
+    Returns one of CHECKMATE, STALEMATE, INSUFFICIENT_MATERIAL, THREEFOLD_REPETITION,
+    FIFTY_MOVE_RULE, CHECK or ONGOING. Legal moves come from move_logic's per-position
+    cache, and the result is cached per position so the renderer and AI trigger reuse it.
+    """
+    color = state.current_turn_color
+    key = board_manager.position_key()
+    status = _status_cache.get(key)
+    if status is None:
+        in_check = is_king_in_check(color)
+        if has_no_legal_moves(color):
+            status = CHECKMATE if in_check else STALEMATE
+        elif has_insufficient_material():
+            status = INSUFFICIENT_MATERIAL
+        else:
+            status = CHECK if in_check else ONGOING
+        if len(_status_cache) >= STATUS_CACHE_LIMIT:
+            _status_cache.clear()
+        _status_cache[key] = status
+
+    # History-dependent draws sit on top of the cached per-position result
+    if status in (CHECK, ONGOING):
+        if state.halfmove_clock >= 100:
+            return FIFTY_MOVE_RULE
+        if repetition_count() >= 3:
+            return THREEFOLD_REPETITION
+    return status
+
+def is_game_over(status=None):
+    """True if the given (or current) status ends the game."""
+    if status is None:
+        status = evaluate_position()
+    return status not in (CHECK, ONGOING)
 
 def is_stalemate(color):
     """Returns True if the current color is in stalemate (no moves, not in check)."""
@@ -31,6 +31,8 @@ def handle_mouse_input(position, ui_rects):
         state.ai_opponent_enabled = not state.ai_opponent_enabled
         if state.ai_opponent_enabled and state.current_turn_color == 'black':
             ai_agent.perform_ai_turn()
+        elif not state.ai_opponent_enabled:
+            ai_agent.cancel_ponder()
         state.active_selected_piece = None
         state.active_selected_pos = None
         state.legal_moves_for_selected = []
@@ -63,7 +65,7 @@ def handle_mouse_input(position, ui_rects):
             if p and p.color == state.current_turn_color:
                 state.active_selected_piece = p
                 state.active_selected_pos = (row, col)
-                state.legal_moves_for_selected = move_logic.get_fully_legal_moves(p, row, col)
+                state.legal_moves_for_selected = move_logic.get_cached_moves_for(row, col)
         
         # Phase 2: Placing the selected piece
         else:
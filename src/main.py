@@ -1,3 +1,7 @@
+import time
+LAUNCHED = time.perf_counter()  # Before the heavy imports, for the cold-start report
+
+import os
 import pygame
 import sys
 
@@ -14,14 +18,29 @@ import game_status
 import engine
 import uci_utils
 import ai_agent
+import ai_interface
 import input_handler
+import sprites
 
 # Connect engine and ai_agent to avoid circularity
 engine.set_ai_agent_module(ai_agent)
 
+def init_display():
+    """Starts pygame and creates the window; the rules modules never do this themselves."""
+    pygame.init()
+    state.screen = pygame.display.set_mode((constants.WINDOW_W, constants.WINDOW_H))
+    pygame.display.set_caption("Chess AI — Grandmaster Coach")
+    sprites.load_sprites()
+
 def start_chess_game():
     """Initializes and runs the main game loop."""
+    init_display()
+    ai_interface.start_warmup()  # Engine starts in the background; AI_STATUS shows its progress
     board_manager.initialize_game_board()
+    start_fen = os.getenv("CHESS_START_FEN")
+    if start_fen:
+        board_manager.load_fen(start_fen)  # e.g. a test position or one to analyse
+    state.timer_increment_seconds = float(os.getenv("CHESS_INCREMENT", "0"))
     throttle = pygame.time.Clock()
 
     ui_rects = {
@@ -31,7 +50,8 @@ def start_chess_game():
         'presets': []
     }
 
-    import ui_renderer # Import inside to ensure state.screen is ready
+    import ui_renderer # GUI layer, only needed once the window exists
+    first_frame = True
 
     while True:
         # --- Timer Logic ---
@@ -59,7 +79,8 @@ def start_chess_game():
                 if event.key == pygame.K_u:
                     engine.undo_move()
 
-        # --- Poll for pending AI move (set by background thread) ---
+        # --- Collect finished engine requests, then apply a pending AI move ---
+        ai_agent.poll()
         if state.pending_ai_move is not None:
             start_pos, end_pos = state.pending_ai_move
             state.pending_ai_move = None          # Consume it immediately
@@ -92,6 +113,9 @@ def start_chess_game():
         ui_renderer.draw_history_panel()
             
         pygame.display.flip()
+        if first_frame:
+            first_frame = False
+            print(f"--- First frame {(time.perf_counter() - LAUNCHED) * 1000:.0f} ms after launch ---")
 
 if __name__ == "__main__":
     start_chess_game()
\ No newline at end of file
@@ -1,33 +1,75 @@
-import pygame
-import constants
+from enum import IntEnum
+
+class PieceType(IntEnum):
+    """Small-int piece type codes; a piece's code is its type plus BLACK_FLAG for Black."""
+    PAWN = 1
+    KNIGHT = 2
+    BISHOP = 3
+    ROOK = 4
+    QUEEN = 5
+    KING = 6
+
+EMPTY = 0
+BLACK_FLAG = 8
+TYPE_CODES = {t.name.lower(): int(t) for t in PieceType}
+COLOR_CODES = {'white': 0, 'black': BLACK_FLAG}
+# code -> (color, type name), for every valid non-empty code
+CODE_NAMES = {COLOR_CODES[color] | code: (color, name)
+              for color in COLOR_CODES for name, code in TYPE_CODES.items()}
+
+# Plain-int type codes for hot-path branches (`piece.kind == PAWN`), cheaper than enum members
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = (int(t) for t in PieceType)
+
+def piece_code(color, type_name):
+    return COLOR_CODES[color] | TYPE_CODES[type_name]
 
 class ChessPiece:
-    def __init__(self, color, type_name, image_path):
+    """A piece on the board. Pure data: sprites are looked up by (color, type) in ui_renderer.
+
+    `color` and `type` are interned strings, used for names (sprites, FEN, bitboard keys);
+    `kind` is the PieceType as a small int, which the move generator branches on, and
+    `code` is color and kind together, which is what the compact board stores.
+    """
+    __slots__ = ('color', 'type', 'kind', 'code', 'has_moved')
+
+    def __init__(self, color, type_name):
         self.color = color
         self.type = type_name
-        self.image = pygame.image.load(image_path)
-        self.image = pygame.transform.scale(self.image, (constants.SQUARE_SIZE, constants.SQUARE_SIZE))
+        self.kind = TYPE_CODES[type_name]
+        self.code = COLOR_CODES[color] | self.kind
         self.has_moved = False
 
-class MoveRecord:  
-    """ for undo move"""
-    """Stores all information needed to reverse a chess move."""
-    def __init__(self, start_pos, end_pos, piece_moved, captured_piece, 
-                 prev_en_passant, is_en_passant=False, 
-                 is_castle=False, rook_move=None, 
-                 is_promotion=False, promoted_from=None):
-        self.start_pos = start_pos
-        self.end_pos = end_pos
-        self.piece_moved = piece_moved
-        self.captured_piece = captured_piece
-        self.prev_en_passant = prev_en_passant
-        self.is_en_passant = is_en_passant
-        self.is_castle = is_castle
-        self.rook_move = rook_move # (rook_piece, r_start, r_end)
-        self.is_promotion = is_promotion
-        self.promoted_from = promoted_from
-        
-        # Save 'has_moved' states
-        self.piece_moved_had_moved = piece_moved.has_moved
-        if rook_move:
-            self.rook_had_moved = rook_move[0].has_moved
+class BoardRow:
+    """Read-only view of one rank of the flat square list, so board[r][c] keeps working."""
+    __slots__ = ('_pieces', '_base')
+
+    def __init__(self, pieces, row):
+        self._pieces = pieces
+        self._base = row * 8
+
+    def __getitem__(self, col):
+        if not 0 <= col < 8:
+            raise IndexError(col)
+        return self._pieces[self._base + col]
+
+    def __len__(self):
+        return 8
+
+    def __iter__(self):
+        return iter(self._pieces[self._base:self._base + 8])
+
+class BoardView:
+    """2D `board[row][col]` view over the 64-entry piece list. Write through board_manager.set_square()."""
+    __slots__ = ('_rows',)
+
+    def __init__(self, pieces):
+        self._rows = tuple(BoardRow(pieces, r) for r in range(8))
+
+    def __getitem__(self, row):
+        return self._rows[row]
+
+    def __len__(self):
+        return 8
+
+    def __iter__(self):
+        return iter(self._rows)
@@ -0,0 +1,103 @@
+"""Packed move and undo encodings for the game history.
+
+A move is a 16-bit int:
+    bits 0-5   from square (row * 8 + col)
+    bits 6-11  to square
+    bits 12-13 promotion piece (0 knight, 1 bishop, 2 rook, 3 queen)
+    bits 14-15 flag (FLAG_NORMAL, FLAG_PROMOTION, FLAG_EN_PASSANT, FLAG_CASTLE)
+
+Undo info is a 32-bit int holding what the move destroys:
+    bits 0-3   captured piece code (models.piece_code, 0 = none)
+    bit  4     captured piece's has_moved
+    bit  5     moving piece's has_moved before the move
+    bit  6     castling rook's has_moved before the move
+    bits 7-10  previous en passant file + 1 (0 = none)
+    bits 11-26 previous halfmove clock
+
+state.move_history and state.undo_history keep these in parallel array('H') / array('I'),
+about 6 bytes per ply. Display strings are built only when the history panel draws them.
+"""
+import sys
+import struct
+from array import array
+from functools import lru_cache
+
+FLAG_NORMAL = 0
+FLAG_PROMOTION = 1
+FLAG_EN_PASSANT = 2
+FLAG_CASTLE = 3
+
+PROMOTION_TYPES = ('knight', 'bishop', 'rook', 'queen')
+PROMOTION_INDEX = {name: i for i, name in enumerate(PROMOTION_TYPES)}
+PROMOTION_LETTERS = 'nbrq'
+
+HISTORY_MAGIC = b'CGMH'
+HISTORY_VERSION = 1
+_HISTORY_HEADER = struct.Struct('<4sBI')  # magic, version, ply count
+
+def encode_move(from_sq, to_sq, flag=FLAG_NORMAL, promotion='queen'):
+    promo_bits = PROMOTION_INDEX[promotion] if flag == FLAG_PROMOTION else 0
+    return from_sq | (to_sq << 6) | (promo_bits << 12) | (flag << 14)
+
+def move_from(move):
+    return move & 0x3F
+
+def move_to(move):
+    return (move >> 6) & 0x3F
+
+def move_flag(move):
+    return move >> 14
+
+def move_promotion(move):
+    """Promotion piece type name, or None if the move is not a promotion."""
+    return PROMOTION_TYPES[(move >> 12) & 3] if move >> 14 == FLAG_PROMOTION else None
+
+def square_name(sq):
+    return f"{chr(ord('a') + sq % 8)}{8 - sq // 8}"
+
+def move_to_uci(move):
+    uci = square_name(move_from(move)) + square_name(move_to(move))
+    if move >> 14 == FLAG_PROMOTION:
+        uci += PROMOTION_LETTERS[(move >> 12) & 3]
+    return uci
+
+def encode_undo(captured_code, captured_had_moved, piece_had_moved, rook_had_moved,
+                prev_en_passant, prev_halfmove_clock):
+    ep_bits = prev_en_passant[1] + 1 if prev_en_passant else 0
+    return (captured_code | (captured_had_moved << 4) | (piece_had_moved << 5) | (rook_had_moved << 6)
+            | (ep_bits << 7) | (min(prev_halfmove_clock, 0xFFFF) << 11))
+
+def decode_undo(undo):
+    """-> (captured_code, captured_had_moved, piece_had_moved, rook_had_moved, ep_file or None, halfmove)."""
+    ep_bits = (undo >> 7) & 0xF
+    return (undo & 0xF, bool(undo & 0x10), bool(undo & 0x20), bool(undo & 0x40),
+            ep_bits - 1 if ep_bits else None, undo >> 11)
+
+@lru_cache(maxsize=1024)
+def describe_move(move, move_number, color_name):
+    """History panel line for one half-move, e.g. "Move 1 White: E2 - E4"."""
+    return (f"Move {move_number} {color_name}: "
+            f"{square_name(move_from(move)).upper()} - {square_name(move_to(move)).upper()}")
+
+# --- Binary Serialization ---
+def pack_history(moves, undo):
+    """Serializes parallel move/undo arrays to a little-endian binary blob."""
+    moves, undo = array('H', moves), array('I', undo)
+    if sys.byteorder == 'big':
+        moves.byteswap()
+        undo.byteswap()
+    return _HISTORY_HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION, len(moves)) + moves.tobytes() + undo.tobytes()
+
+def unpack_history(blob):
+    """Inverse of pack_history(); returns (array('H') moves, array('I') undo)."""
+    magic, version, count = _HISTORY_HEADER.unpack_from(blob)
+    if magic != HISTORY_MAGIC or version != HISTORY_VERSION:
+        raise ValueError("Not a move history blob")
+    offset = _HISTORY_HEADER.size
+    moves, undo = array('H'), array('I')
+    moves.frombytes(blob[offset:offset + 2 * count])
+    undo.frombytes(blob[offset + 2 * count:offset + 6 * count])
+    if sys.byteorder == 'big':
+        moves.byteswap()
+        undo.byteswap()
+    return moves, undo
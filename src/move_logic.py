@@ -1,40 +1,179 @@
 import state
-from move_physics import get_raw_piece_moves, is_king_in_check, is_cell_attacked
+import board_manager
+from models import PAWN, ROOK, KING
+from bitboard import (FULL_BOARD, BETWEEN, to_coords, rook_attacks, bishop_attacks)
+from move_physics import (get_raw_piece_moves_bb, is_square_attacked, attackers_to,
+                          en_passant_bitboard)
+
+def get_legal_context(color):
+    """Computes, once per position, what every legality test for `color` needs.
+
+    Returns (king_sq, checkers, check_mask, pins) where `check_mask` holds the squares a
+    non-king move must land on (block or capture the checker) and `pins` maps each pinned
+    piece's square index to the ray it may still move along.
+    """
+    king_pos = state.king_squares[color]
+    if king_pos is None:
+        return None, 0, FULL_BOARD, {}
+
+    enemy_color = 'black' if color == 'white' else 'white'
+    king_sq = king_pos[0] * 8 + king_pos[1]
+    occupied = state.color_bitboards['white'] | state.color_bitboards['black']
+    own = state.color_bitboards[color]
+
+    checkers = attackers_to(king_sq, enemy_color, occupied)
+    if not checkers:
+        check_mask = FULL_BOARD
+    elif checkers & (checkers - 1):
+        check_mask = 0  # Double check: only the king may move
+    else:
+        check_mask = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+
+    # Enemy sliders that would hit the king on an empty board are potential pinners
+    queens = state.piece_bitboards[(enemy_color, 'queen')]
+    snipers = ((rook_attacks(king_sq, 0) & (state.piece_bitboards[(enemy_color, 'rook')] | queens))
+               | (bishop_attacks(king_sq, 0) & (state.piece_bitboards[(enemy_color, 'bishop')] | queens)))
+    pins = {}
+    while snipers:
+        sniper = snipers & -snipers
+        snipers ^= sniper
+        sniper_sq = sniper.bit_length() - 1
+        blockers = BETWEEN[king_sq][sniper_sq] & occupied
+        # Exactly one piece in the way, and it is ours: it may only slide along the pin
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            pins[blockers.bit_length() - 1] = BETWEEN[king_sq][sniper_sq] | sniper
+
+    return king_sq, checkers, check_mask, pins
+
+def _legal_target_bits(piece, row, col, context):
+    """Bitboard of legal targets for one piece, filtered analytically without touching the board."""
+    king_sq, checkers, check_mask, pins = context
+    sq = row * 8 + col
+    raw_moves = get_raw_piece_moves_bb(piece, row, col)
+    enemy_color = 'black' if piece.color == 'white' else 'white'
+    occupied = state.color_bitboards['white'] | state.color_bitboards['black']
+
+    if piece.kind == KING:
+        # Lift the king off the board so sliders keep attacking "through" its old square
+        occupied_without_king = occupied & ~(1 << sq)
+        legal_bits = 0
+        targets = raw_moves
+        while targets:
+            to_bit = targets & -targets
+            targets ^= to_bit
+            if not is_square_attacked(to_bit.bit_length() - 1, enemy_color, occupied_without_king):
+                legal_bits |= to_bit
+        return legal_bits
+
+    if king_sq is None:
+        return raw_moves
+
+    pin_mask = pins.get(sq, FULL_BOARD)
+    legal_bits = raw_moves & check_mask & pin_mask
+
+    ep_bit = en_passant_bitboard() if piece.kind == PAWN else 0
+    if raw_moves & ep_bit:
+        legal_bits &= ~ep_bit
+        captured = 1 << (ep_bit.bit_length() - 1 + (8 if piece.color == 'white' else -8))
+        # En passant answers a check by blocking on the target square or by removing the checking pawn
+        if ep_bit & pin_mask and (ep_bit & check_mask or captured == checkers):
+            # Both pawns leave the rank at once, which can uncover a slider on the king
+            occupied_after = (occupied & ~(1 << sq) & ~captured) | ep_bit
+            queens = state.piece_bitboards[(enemy_color, 'queen')]
+            exposed = ((rook_attacks(king_sq, occupied_after) & (state.piece_bitboards[(enemy_color, 'rook')] | queens))
+                       | (bishop_attacks(king_sq, occupied_after) & (state.piece_bitboards[(enemy_color, 'bishop')] | queens)))
+            if not exposed:
+                legal_bits |= ep_bit
+
+    return legal_bits
 
 def get_fully_legal_moves(piece, row, col):
     """Refines raw moves with safety checks to ensure the King isn't left in Check."""
-    raw_moves = get_raw_piece_moves(piece, row, col)
+    context = get_legal_context(piece.color)
+    legal_moves = to_coords(_legal_target_bits(piece, row, col, context))
+    if piece.kind == KING and not context[1]:
+        legal_moves += get_castling_moves(piece, row, col)
+    return legal_moves
+
+def iter_legal_moves(color):
+    """Yields every legal move for `color` as ((start_r, start_c), (end_r, end_c)), lazily."""
+    context = get_legal_context(color)
+    for (row, col), piece in list(state.piece_lists[color].items()):
+        for target in to_coords(_legal_target_bits(piece, row, col, context)):
+            yield (row, col), target
+        if piece.kind == KING and not context[1]:
+            for target in get_castling_moves(piece, row, col):
+                yield (row, col), target
+
+def generate_all_legal_moves(color):
+    """Returns every legal move for `color` as a list of ((start_r, start_c), (end_r, end_c))."""
+    return list(iter_legal_moves(color))
+
+# --- Legal Move Cache ---
+# Every legal move of the side to move, grouped by start square, for one position key.
+# Built lazily on first query; execute_move/undo_move invalidate it explicitly as well.
+_legal_cache_key = None
+_legal_cache_moves = {}
+legal_cache_hits = 0
+legal_cache_misses = 0
+
+def get_cached_legal_moves():
+    """All legal moves of the side to move as {(start_r, start_c): [(end_r, end_c), ...]}."""
+    global _legal_cache_key, _legal_cache_moves, legal_cache_hits, legal_cache_misses
+    key = board_manager.position_key()
+    if key == _legal_cache_key:
+        legal_cache_hits += 1
+        return _legal_cache_moves
+
+    legal_cache_misses += 1
+    moves = {}
+    for start_pos, end_pos in iter_legal_moves(state.current_turn_color):
+        moves.setdefault(start_pos, []).append(end_pos)
+    _legal_cache_key, _legal_cache_moves = key, moves
+    return moves
+
+def get_cached_moves_for(row, col):
+    """Legal targets of the piece on (row, col) from the cache (empty if it can't move)."""
+    return list(get_cached_legal_moves().get((row, col), ()))
+
+def invalidate_legal_move_cache():
+    global _legal_cache_key, _legal_cache_moves
+    _legal_cache_key = None
+    _legal_cache_moves = {}
+
+def legal_move_cache_stats():
+    """Hit/miss counters of the legal move cache."""
+    total = legal_cache_hits + legal_cache_misses
+    return {
+        'hits': legal_cache_hits,
+        'misses': legal_cache_misses,
+        'hit_rate': legal_cache_hits / total if total else 0.0,
+    }
+
+def get_castling_moves(piece, row, col):
+    """Castling targets for an unmoved king, if the path is clear and not attacked."""
     legal_moves = []
+    if piece.kind != KING or piece.has_moved:
+        return legal_moves
+
+    enemy_color = 'black' if piece.color == 'white' else 'white'
+    occupied = state.color_bitboards['white'] | state.color_bitboards['black']
+    if is_square_attacked(row * 8 + col, enemy_color, occupied):
+        return legal_moves
 
-    # Filter out moves that would cause self-check
-    for target_r, target_c in raw_moves:
-        original_piece = state.board[target_r][target_c]
-        
-        # Simulate move
-        state.board[target_r][target_c] = piece
-        state.board[row][col] = None
-        is_safe = not is_king_in_check(piece.color)
-        
-        if is_safe:
-            legal_moves.append((target_r, target_c))
-            
-        # Revert simulation else condition
-        state.board[row][col] = piece
-        state.board[target_r][target_c] = original_piece
-
-    # Specialized Castling Logic
-    if piece.type == 'king' and not piece.has_moved and not is_king_in_check(piece.color):
-        # Kingside (Right)
-        rook_r = state.board[row][7]
-        if rook_r and rook_r.type == 'rook' and not rook_r.has_moved:
-            if state.board[row][5] is None and state.board[row][6] is None:
-                if not is_cell_attacked(row, 5, piece.color) and not is_cell_attacked(row, 6, piece.color):
-                    legal_moves.append((row, 6))
-        # Queenside (Left)
-        rook_l = state.board[row][0]
-        if rook_l and rook_l.type == 'rook' and not rook_l.has_moved:
-            if state.board[row][1] is None and state.board[row][2] is None and state.board[row][3] is None:
-                if not is_cell_attacked(row, 2, piece.color) and not is_cell_attacked(row, 3, piece.color):
-                    legal_moves.append((row, 2))
+    # Kingside (Right)
+    rook_r = state.square_pieces[row * 8 + 7]
+    if rook_r and rook_r.kind == ROOK and not rook_r.has_moved:
+        if not state.squares[row * 8 + 5] and not state.squares[row * 8 + 6]:
+            if (not is_square_attacked(row * 8 + 5, enemy_color, occupied)
+                    and not is_square_attacked(row * 8 + 6, enemy_color, occupied)):
+                legal_moves.append((row, 6))
+    # Queenside (Left)
+    rook_l = state.square_pieces[row * 8]
+    if rook_l and rook_l.kind == ROOK and not rook_l.has_moved:
+        if not state.squares[row * 8 + 1] and not state.squares[row * 8 + 2] and not state.squares[row * 8 + 3]:
+            if (not is_square_attacked(row * 8 + 2, enemy_color, occupied)
+                    and not is_square_attacked(row * 8 + 3, enemy_color, occupied)):
+                legal_moves.append((row, 2))
 
     return legal_moves
@@ -1,80 +1,116 @@
 import state
+from models import PAWN, KNIGHT, BISHOP, ROOK, KING
+from bitboard import (KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS,
+                      rook_attacks, bishop_attacks, queen_attacks, to_coords)
 
 def find_king(color):
     """Utility to quickly find the King's current coordinates."""
-    for r in range(8):
-        for c in range(8):
-            p = state.board[r][c]
-            if p and p.type == 'king' and p.color == color:
-                return (r, c)
-    return None
+    return state.king_squares[color]
+
+def occupied_bitboard():
+    """Bitboard of every occupied square."""
+    return state.color_bitboards['white'] | state.color_bitboards['black']
+
+def en_passant_bitboard():
+    """Single-bit bitboard of the current en passant target square (0 if none)."""
+    if state.pawn_en_passant_target is None:
+        return 0
+    ep_r, ep_c = state.pawn_en_passant_target
+    return 1 << (ep_r * 8 + ep_c)
+
+def get_raw_piece_moves_bb(piece, row, col):
+    """Bitboard of basic physics-based target squares, ignoring specialized rules like 'Check'."""
+    sq = row * 8 + col
+    own = state.color_bitboards[piece.color]
+    enemy = state.color_bitboards['black' if piece.color == 'white' else 'white']
+    occupied = own | enemy
 
-def get_raw_piece_moves(piece, row, col):
-    """Calculates basic physics-based moves, ignoring specialized rules like 'Check'."""
-    moves = []
-    
     # Pawn-specific movement logic
-    if piece.type == 'pawn':
+    kind = piece.kind
+    if kind == PAWN:
+        targets = PAWN_ATTACKS[piece.color][sq] & (enemy | en_passant_bitboard())
         move_dir = -1 if piece.color == 'white' else 1
         # Forward move (blocked by any piece)
-        if 0 <= row + move_dir < 8 and state.board[row + move_dir][col] is None:
-            moves.append((row + move_dir, col))
-            start_row = 6 if piece.color == 'white' else 1
-            # Double move from start rank
-            if row == start_row and state.board[row + 2 * move_dir][col] is None:
-                moves.append((row + 2 * move_dir, col))
-        # Captures
-        for direction_col in [-1, 1]:
-            targeted_row, targeted_col = row + move_dir, col + direction_col
-            if 0 <= targeted_row < 8 and 0 <= targeted_col < 8:
-                target = state.board[targeted_row][targeted_col]
-                if target and target.color != piece.color:
-                    moves.append((targeted_row,targeted_col))
-                elif (targeted_row, targeted_col) == state.pawn_en_passant_target:
-                    moves.append((targeted_row,targeted_col))
-        return moves
+        if 0 <= row + move_dir < 8:
+            one_step = 1 << (sq + 8 * move_dir)
+            if not occupied & one_step:
+                targets |= one_step
+                start_row = 6 if piece.color == 'white' else 1
+                # Double move from start rank
+                if row == start_row:
+                    two_step = 1 << (sq + 16 * move_dir)
+                    if not occupied & two_step:
+                        targets |= two_step
+        return targets
 
-    # Sliding logic for Rooks, Bishops, and Queens
-    is_sliding = piece.type in ['rook', 'bishop', 'queen']
-    directions = []
-    if piece.type in ['rook', 'queen']:
-        directions += [(1,0), (-1,0), (0,1), (0,-1)]
-    if piece.type in ['bishop', 'queen']:
-        directions += [(1,1), (1,-1), (-1,1), (-1,-1)]
-    if piece.type == 'knight':
-        directions = [(2,1), (2,-1), (-2,1), (-2,-1), (1,2), (1,-2), (-1,2), (-1,-2)]
-    if piece.type == 'king':
-        directions = [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[sq] & ~own
+    if kind == KING:
+        return KING_ATTACKS[sq] & ~own
+    if kind == ROOK:
+        return rook_attacks(sq, occupied) & ~own
+    if kind == BISHOP:
+        return bishop_attacks(sq, occupied) & ~own
+    return queen_attacks(sq, occupied) & ~own
 
-    for direction_row, direction_col in directions:
-        curr_r, curr_c = row + direction_row, col + direction_col
-        while 0 <= curr_r < 8 and 0 <= curr_c < 8:
-            blocking_p = state.board[curr_r][curr_c]
-            # Valid if empty or contains an enemy
-            if blocking_p is None or blocking_p.color != piece.color:
-                moves.append((curr_r, curr_c))
-            
-            # Stop if the path is blocked OR if piece doesn't slide (Knight/King)
-            if not is_sliding or blocking_p:
-                break
-            curr_r += direction_row
-            curr_c += direction_col
-    return moves
+def get_raw_piece_moves(piece, row, col):
+    """Calculates basic physics-based moves, ignoring specialized rules like 'Check'."""
+    return to_coords(get_raw_piece_moves_bb(piece, row, col))
+
+def attackers_to(sq, attacker_color, occupied, removed=0, piece_bitboards=None):
+    """Bitboard of `attacker_color` pieces that attack square index `sq`.
+
+    Works outward from the target: knight jumps, pawn diagonals, the king ring and
+    sliding rays up to the first blocker. `removed` masks out captured attackers.
+    `piece_bitboards` defaults to the board's; pass another to test a position not on it.
+    """
+    bbs = piece_bitboards or state.piece_bitboards
+    defender_color = 'black' if attacker_color == 'white' else 'white'
+    # A pawn of ours on `sq` would attack exactly the squares enemy pawns attack it from
+    attackers = ((PAWN_ATTACKS[defender_color][sq] & bbs[(attacker_color, 'pawn')])
+                 | (KNIGHT_ATTACKS[sq] & bbs[(attacker_color, 'knight')])
+                 | (KING_ATTACKS[sq] & bbs[(attacker_color, 'king')]))
+    queens = bbs[(attacker_color, 'queen')]
+    rooks = bbs[(attacker_color, 'rook')] | queens
+    if rooks:
+        attackers |= rook_attacks(sq, occupied) & rooks
+    bishops = bbs[(attacker_color, 'bishop')] | queens
+    if bishops:
+        attackers |= bishop_attacks(sq, occupied) & bishops
+    return attackers & ~removed
+
+def is_square_attacked(sq, attacker_color, occupied, removed=0):
+    """Early-exit version of attackers_to(): True as soon as one attacker is found."""
+    bbs = state.piece_bitboards
+    keep = ~removed
+    if KNIGHT_ATTACKS[sq] & bbs[(attacker_color, 'knight')] & keep:
+        return True
+    defender_color = 'black' if attacker_color == 'white' else 'white'
+    if PAWN_ATTACKS[defender_color][sq] & bbs[(attacker_color, 'pawn')] & keep:
+        return True
+    if KING_ATTACKS[sq] & bbs[(attacker_color, 'king')]:
+        return True
+    queens = bbs[(attacker_color, 'queen')]
+    rooks = (bbs[(attacker_color, 'rook')] | queens) & keep
+    if rooks and rook_attacks(sq, occupied) & rooks:
+        return True
+    bishops = (bbs[(attacker_color, 'bishop')] | queens) & keep
+    return bool(bishops and bishop_attacks(sq, occupied) & bishops)
 
 def is_cell_attacked(target_row, target_col, defender_color):
     """Returns True if the specified square is reachable by ANY enemy piece."""
     opponent_color = 'black' if defender_color == 'white' else 'white'
-    for r in range(8):
-        for c in range(8):
-            piece = state.board[r][c]
-            if piece and piece.color == opponent_color:
-                if (target_row, target_col) in get_raw_piece_moves(piece, r, c):
-                    return True
-    return False
+    return is_square_attacked(target_row * 8 + target_col, opponent_color, occupied_bitboard())
+
+def get_cell_attackers(target_row, target_col, defender_color):
+    """Returns the (row, col) of every enemy piece attacking the specified square."""
+    opponent_color = 'black' if defender_color == 'white' else 'white'
+    return to_coords(attackers_to(target_row * 8 + target_col, opponent_color, occupied_bitboard()))
 
 def is_king_in_check(color):
     """Boolean check for whether the current color's King is under threat."""
-    k_pos = find_king(color)
+    k_pos = state.king_squares[color]
     if k_pos:
-        return is_cell_attacked(k_pos[0], k_pos[1], color)
+        opponent_color = 'black' if color == 'white' else 'white'
+        return is_square_attacked(k_pos[0] * 8 + k_pos[1], opponent_color, occupied_bitboard())
     return False
@@ -0,0 +1,574 @@
+"""Built-in chess engine used when Stockfish isn't available.
+
+Iterative-deepening alpha-beta (negamax) with a transposition table keyed by the Zobrist
+key, quiescence search, MVV-LVA and killer move ordering, and a depth/time/node budget.
+MultiPV (UCI option) reports the best N root moves, each with its own score and PV.
+It runs on the project's own move generator (move_logic + engine.make_move).
+
+Searching mutates the global board, so the game never calls search() in-process: run this
+file as a separate UCI engine process instead (ai_interface does that automatically):
+    python src/native_engine.py            # speak UCI on stdin/stdout
+    python src/native_engine.py --bench    # nodes/sec and bestmove latency at fixed depth
+    python src/native_engine.py --bench --multipv 3
+"""
+import sys
+import time
+import argparse
+import threading
+
+import state
+import board_manager
+import engine
+import move_logic
+from move_physics import is_king_in_check
+from models import PAWN
+
+ENGINE_NAME = "GrandMaster Native"
+MATE_SCORE = 100000
+MATE_THRESHOLD = MATE_SCORE - 1000
+INFINITY = 10 ** 9
+MAX_PLY = 96
+TT_LIMIT = 400000
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+DEFAULT_MOVETIME_MS = 1000
+MAX_MULTIPV = 16
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# --- Evaluation: material + piece-square tables ---
+PIECE_VALUES = {'pawn': 100, 'knight': 320, 'bishop': 330, 'rook': 500, 'queen': 900, 'king': 0}
+# Least valuable attacker first for MVV-LVA ordering
+ATTACKER_RANK = {'pawn': 1, 'knight': 2, 'bishop': 3, 'rook': 4, 'queen': 5, 'king': 6}
+
+# Tables are from White's point of view with a8 first, i.e. indexed like row * 8 + col
+PIECE_SQUARE_TABLES = {
+    'pawn': [
+         0,  0,  0,  0,  0,  0,  0,  0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+         5,  5, 10, 25, 25, 10,  5,  5,
+         0,  0,  0, 20, 20,  0,  0,  0,
+         5, -5,-10,  0,  0,-10, -5,  5,
+         5, 10, 10,-20,-20, 10, 10,  5,
+         0,  0,  0,  0,  0,  0,  0,  0],
+    'knight': [
+        -50,-40,-30,-30,-30,-30,-40,-50,
+        -40,-20,  0,  0,  0,  0,-20,-40,
+        -30,  0, 10, 15, 15, 10,  0,-30,
+        -30,  5, 15, 20, 20, 15,  5,-30,
+        -30,  0, 15, 20, 20, 15,  0,-30,
+        -30,  5, 10, 15, 15, 10,  5,-30,
+        -40,-20,  0,  5,  5,  0,-20,-40,
+        -50,-40,-30,-30,-30,-30,-40,-50],
+    'bishop': [
+        -20,-10,-10,-10,-10,-10,-10,-20,
+        -10,  0,  0,  0,  0,  0,  0,-10,
+        -10,  0,  5, 10, 10,  5,  0,-10,
+        -10,  5,  5, 10, 10,  5,  5,-10,
+        -10,  0, 10, 10, 10, 10,  0,-10,
+        -10, 10, 10, 10, 10, 10, 10,-10,
+        -10,  5,  0,  0,  0,  0,  5,-10,
+        -20,-10,-10,-10,-10,-10,-10,-20],
+    'rook': [
+         0,  0,  0,  0,  0,  0,  0,  0,
+         5, 10, 10, 10, 10, 10, 10,  5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+         0,  0,  0,  5,  5,  0,  0,  0],
+    'queen': [
+        -20,-10,-10, -5, -5,-10,-10,-20,
+        -10,  0,  0,  0,  0,  0,  0,-10,
+        -10,  0,  5,  5,  5,  5,  0,-10,
+         -5,  0,  5,  5,  5,  5,  0, -5,
+          0,  0,  5,  5,  5,  5,  0, -5,
+        -10,  5,  5,  5,  5,  5,  0,-10,
+        -10,  0,  5,  0,  0,  0,  0,-10,
+        -20,-10,-10, -5, -5,-10,-10,-20],
+    'king': [
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -20,-30,-30,-40,-40,-30,-30,-20,
+        -10,-20,-20,-20,-20,-20,-20,-10,
+         20, 20,  0,  0,  0,  0, 20, 20,
+         20, 30, 10,  0,  0, 10, 30, 20],
+}
+
+# --- Search State (one search at a time per process) ---
+_tt = {}             # zobrist key -> (depth, score, flag, best_move, generation)
+_generation = 0      # Bumped by every search(); tags the TT entries it stores
+_fresh_tt_only = False  # MultiPV search: entries from earlier searches count as misses
+_killers = [[None, None] for _ in range(MAX_PLY + 1)]
+_nodes = 0
+_deadline = None
+_node_limit = None
+_stop = False
+_root_best_move = None
+_excluded_root = ()  # Root moves already reported as better lines in this MultiPV iteration
+
+def evaluate():
+    """Static evaluation in centipawns from the side to move's point of view."""
+    score = 0
+    for (r, c), p in state.piece_lists['white'].items():
+        score += PIECE_VALUES[p.type] + PIECE_SQUARE_TABLES[p.type][r * 8 + c]
+    for (r, c), p in state.piece_lists['black'].items():
+        score -= PIECE_VALUES[p.type] + PIECE_SQUARE_TABLES[p.type][(7 - r) * 8 + c]
+    return score if state.current_turn_color == 'white' else -score
+
+def stop_search():
+    """Asks a running search to return as soon as possible (safe to call from another thread)."""
+    global _stop
+    _stop = True
+
+def start_clock(movetime_ms):
+    """Starts the time limit of a running search now (used on ponderhit)."""
+    global _deadline
+    _deadline = time.perf_counter() + movetime_ms / 1000.0
+
+def move_to_uci(move):
+    (sr, sc), (er, ec) = move
+    uci = f"{chr(ord('a') + sc)}{8 - sr}{chr(ord('a') + ec)}{8 - er}"
+    piece = state.square_pieces[sr * 8 + sc]
+    if piece and piece.kind == PAWN and er in (0, 7):
+        uci += 'q'  # The search only considers queen promotions
+    return uci
+
+def _is_capture(move):
+    (sr, sc), end = move
+    if state.square_pieces[end[0] * 8 + end[1]] is not None:
+        return True
+    return state.square_pieces[sr * 8 + sc].kind == PAWN and end == state.pawn_en_passant_target
+
+def _capture_order(move):
+    """MVV-LVA: most valuable victim first, least valuable attacker breaks ties."""
+    (sr, sc), (er, ec) = move
+    victim = state.square_pieces[er * 8 + ec]
+    victim_value = PIECE_VALUES[victim.type] if victim else PIECE_VALUES['pawn']
+    return victim_value * 10 - ATTACKER_RANK[state.square_pieces[sr * 8 + sc].type]
+
+def _order_moves(moves, tt_move, ply):
+    killers = _killers[ply]
+
+    def score(move):
+        if move == tt_move:
+            return 10000000
+        if _is_capture(move):
+            return 1000000 + _capture_order(move)
+        (sr, sc), (er, _) = move
+        if state.square_pieces[sr * 8 + sc].kind == PAWN and er in (0, 7):
+            return 900000
+        if move == killers[0]:
+            return 800000
+        if move == killers[1]:
+            return 700000
+        return 0
+
+    return sorted(moves, key=score, reverse=True)
+
+def _check_limits():
+    global _stop
+    if (_deadline is not None and time.perf_counter() >= _deadline) or \
+       (_node_limit is not None and _nodes >= _node_limit):
+        _stop = True
+
+def _is_draw():
+    if state.halfmove_clock >= 100:
+        return True
+    # One earlier occurrence is enough inside the search tree
+    window = state.position_history[-(state.halfmove_clock + 1):-1]
+    return state.zobrist_key in window
+
+def _score_to_tt(score, ply):
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+def _score_from_tt(score, ply):
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+def _quiesce(alpha, beta, ply):
+    global _nodes
+    _nodes += 1
+    if not _nodes & 1023:
+        _check_limits()
+    if _stop:
+        return 0
+
+    stand_pat = evaluate()
+    if stand_pat >= beta or ply >= MAX_PLY:
+        return stand_pat
+    if stand_pat > alpha:
+        alpha = stand_pat
+
+    captures = [m for m in move_logic.generate_all_legal_moves(state.current_turn_color) if _is_capture(m)]
+    captures.sort(key=_capture_order, reverse=True)
+    for move in captures:
+        record = engine.make_move(*move)
+        score = -_quiesce(-beta, -alpha, ply + 1)
+        engine.unmake_move(record)
+        if _stop:
+            return 0
+        if score >= beta:
+            return score
+        if score > alpha:
+            alpha = score
+    return alpha
+
+def _negamax(depth, alpha, beta, ply):
+    global _nodes, _root_best_move
+    _nodes += 1
+    if not _nodes & 1023:
+        _check_limits()
+    if _stop:
+        return 0
+    if ply and _is_draw():
+        return 0
+    if ply >= MAX_PLY:
+        return evaluate()
+
+    color = state.current_turn_color
+    in_check = is_king_in_check(color)
+    if in_check:
+        depth += 1  # Check extension
+    if depth <= 0:
+        return _quiesce(alpha, beta, ply)
+
+    key = state.zobrist_key
+    tt_move = None
+    entry = _tt.get(key)
+    if entry and _fresh_tt_only and entry[4] != _generation:
+        entry = None
+    if entry:
+        tt_depth, tt_score, tt_flag, tt_move, _ = entry
+        if ply and tt_depth >= depth:
+            # Only cut when the stored bound settles this window; narrowing the window instead
+            # would return bounds the caller takes as exact (wrong MultiPV line scores)
+            tt_score = _score_from_tt(tt_score, ply)
+            if (tt_flag == TT_EXACT or (tt_flag == TT_LOWER and tt_score >= beta)
+                    or (tt_flag == TT_UPPER and tt_score <= alpha)):
+                return tt_score
+
+    moves = move_logic.generate_all_legal_moves(color)
+    if not moves:
+        return -MATE_SCORE + ply if in_check else 0
+    if not ply and _excluded_root:
+        moves = [move for move in moves if move not in _excluded_root]
+
+    alpha_orig = alpha
+    best_score = -INFINITY
+    best_move = None
+    for move in _order_moves(moves, tt_move, ply):
+        record = engine.make_move(*move)
+        score = -_negamax(depth - 1, -beta, -alpha, ply + 1)
+        engine.unmake_move(record)
+        if _stop:
+            return 0
+        if score > best_score:
+            best_score, best_move = score, move
+            if ply == 0:
+                _root_best_move = move
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            if not _is_capture(move) and _killers[ply][0] != move:
+                _killers[ply][1] = _killers[ply][0]
+                _killers[ply][0] = move
+            break
+
+    if best_score <= alpha_orig:
+        flag = TT_UPPER
+    elif best_score >= beta:
+        flag = TT_LOWER
+    else:
+        flag = TT_EXACT
+    if len(_tt) >= TT_LIMIT:
+        _tt.clear()
+    _tt[key] = (depth, _score_to_tt(best_score, ply), flag, best_move, _generation)
+    return best_score
+
+def _extract_pv(max_len):
+    """Follows best moves through the transposition table from the current position."""
+    pv, records = [], []
+    while len(pv) < max_len:
+        entry = _tt.get(state.zobrist_key)
+        if not entry or entry[3] is None:
+            break
+        move = entry[3]
+        if move not in move_logic.generate_all_legal_moves(state.current_turn_color):
+            break
+        pv.append(move_to_uci(move))
+        records.append(engine.make_move(*move))
+    for record in reversed(records):
+        engine.unmake_move(record)
+    return pv
+
+def score_to_uci(score):
+    """Internal score -> {'type': 'cp'|'mate', 'value': int}, side-to-move relative."""
+    if abs(score) > MATE_THRESHOLD:
+        plies = MATE_SCORE - abs(score)
+        moves = (plies + 1) // 2
+        return {'type': 'mate', 'value': moves if score > 0 else -moves}
+    return {'type': 'cp', 'value': score}
+
+def _search_lines(depth, count):
+    """One iteration: the best `count` root moves as [(score, move)], best first. Line k is
+    searched with lines 1..k-1 excluded at the root. Cut short if the search is stopped."""
+    global _root_best_move, _excluded_root
+    lines, root_entry = [], None
+    root_key = state.zobrist_key
+    try:
+        for _ in range(count):
+            _root_best_move = None
+            score = _negamax(depth, -INFINITY, INFINITY, 0)
+            if _stop or _root_best_move is None:
+                break
+            lines.append((score, _root_best_move))
+            if len(lines) == 1:
+                root_entry = _tt.get(root_key)
+            _excluded_root += (_root_best_move,)
+    finally:
+        _excluded_root = ()
+    if len(lines) > 1 and root_entry:
+        _tt[root_key] = root_entry  # The next iteration starts from the real best move
+    return lines
+
+def _line_pv(move, depth):
+    record = engine.make_move(*move)
+    pv = [move_to_uci(move)] + _extract_pv(depth - 1)
+    engine.unmake_move(record)
+    return pv
+
+def search(depth=None, movetime_ms=None, nodes=None, info_callback=None, multipv=1):
+    """Searches the current position and returns a result dict.
+
+    Keys: best_move (UCI or None), score ({'type', 'value'}), depth, nodes, nps, time_ms, pv,
+    and lines: the best `multipv` root moves as {'move', 'score', 'depth', 'pv'}, best first.
+    Without any limit the search stops after DEFAULT_MOVETIME_MS.
+    """
+    global _nodes, _deadline, _node_limit, _stop, _root_best_move, _generation, _fresh_tt_only
+    start = time.perf_counter()
+    if depth is None and movetime_ms is None and nodes is None:
+        movetime_ms = DEFAULT_MOVETIME_MS
+    _nodes = 0
+    _deadline = start + movetime_ms / 1000.0 if movetime_ms is not None else None
+    _node_limit = nodes
+    _stop = False
+    _root_best_move = None
+    for slot in _killers:
+        slot[0] = slot[1] = None
+    # MultiPV lines are ranked against each other, so they must all come from searches of
+    # the same depth: a deeper entry left by an earlier search would lift only some of them
+    _generation += 1
+    _fresh_tt_only = multipv > 1
+
+    result = {'best_move': None, 'score': {'type': 'cp', 'value': 0}, 'depth': 0,
+              'nodes': 0, 'nps': 0, 'time_ms': 0, 'pv': [], 'lines': []}
+    root_moves = move_logic.generate_all_legal_moves(state.current_turn_color)
+    if not root_moves:
+        in_check = is_king_in_check(state.current_turn_color)
+        result['score'] = {'type': 'mate', 'value': 0} if in_check else {'type': 'cp', 'value': 0}
+        return result
+
+    best_move = _order_moves(root_moves, None, 0)[0]
+    line_count = max(1, min(multipv, len(root_moves)))
+    for current_depth in range(1, (depth or MAX_PLY) + 1):
+        lines = _search_lines(current_depth, line_count)
+        if _stop:
+            # A partial iteration still improves on the last one if it found a move
+            if result['depth'] == 0:
+                best_move = lines[0][1] if lines else _root_best_move or best_move
+            break
+        score, best_move = lines[0]
+        elapsed = time.perf_counter() - start
+        result['lines'] = [{'move': move_to_uci(move), 'score': score_to_uci(line_score), 'depth': current_depth,
+                            'pv': _line_pv(move, current_depth)} for line_score, move in lines]
+        result.update(best_move=move_to_uci(best_move), score=score_to_uci(score), depth=current_depth,
+                      nodes=_nodes, time_ms=int(elapsed * 1000), nps=int(_nodes / elapsed) if elapsed else 0,
+                      pv=result['lines'][0]['pv'])
+        if info_callback:
+            info_callback(result)
+        if abs(score) > MATE_THRESHOLD and MATE_SCORE - abs(score) <= current_depth:
+            break  # Forced mate found within the searched horizon
+        # Another iteration costs several times this one; don't start what can't finish
+        if _deadline is not None and time.perf_counter() + elapsed * 2 > _deadline:
+            break
+
+    elapsed = time.perf_counter() - start
+    result.update(best_move=move_to_uci(best_move), nodes=_nodes, time_ms=int(elapsed * 1000),
+                  nps=int(_nodes / elapsed) if elapsed else 0)
+    return result
+
+def search_fen(fen, **limits):
+    """Loads `fen` into this process's board and searches it (see search())."""
+    board_manager.load_fen(fen)
+    return search(**limits)
+
+# --- UCI Protocol ---
+def _uci_info_line(result, rank=None):
+    score = result['score']
+    multipv = f" multipv {rank}" if rank else ""
+    return (f"info depth {result['depth']}{multipv} score {score['type']} {score['value']} nodes {result['nodes']} "
+            f"nps {result['nps']} time {result['time_ms']} pv {' '.join(result['pv'])}")
+
+def _print_info(result, multipv):
+    if multipv > 1 and result['lines']:
+        for rank, line in enumerate(result['lines'], 1):
+            print(_uci_info_line({**result, 'score': line['score'], 'pv': line['pv']}, rank), flush=True)
+    else:
+        print(_uci_info_line(result), flush=True)
+
+def _apply_uci_move(uci):
+    from uci_utils import uci_to_grid
+    start_pos, end_pos = uci_to_grid(uci)
+    promotion = {'q': 'queen', 'r': 'rook', 'b': 'bishop', 'n': 'knight'}.get(uci[4:5], 'queen')
+    engine.make_move(start_pos, end_pos, promotion)
+
+def _set_position(tokens):
+    if tokens[0] == 'startpos':
+        board_manager.load_fen(START_FEN)
+        rest = tokens[1:]
+    else:
+        fen_end = tokens.index('moves') if 'moves' in tokens else len(tokens)
+        board_manager.load_fen(" ".join(tokens[1:fen_end]))
+        rest = tokens[fen_end:]
+    if rest and rest[0] == 'moves':
+        for uci in rest[1:]:
+            _apply_uci_move(uci)
+
+def _go_limits(tokens):
+    """Translates `go` arguments into search() limits."""
+    args = {}
+    for i in range(0, len(tokens) - 1):
+        if tokens[i] in ('depth', 'movetime', 'nodes', 'wtime', 'btime', 'winc', 'binc', 'movestogo'):
+            args[tokens[i]] = int(tokens[i + 1])
+    if 'infinite' in tokens:
+        return {'depth': MAX_PLY}
+    limits = {}
+    if 'depth' in args:
+        limits['depth'] = args['depth']
+    if 'nodes' in args:
+        limits['nodes'] = args['nodes']
+    if 'movetime' in args:
+        limits['movetime_ms'] = args['movetime']
+    elif 'wtime' in args or 'btime' in args:
+        side = 'w' if state.current_turn_color == 'white' else 'b'
+        remaining = args.get(f'{side}time', 0)
+        increment = args.get(f'{side}inc', 0)
+        moves_to_go = args.get('movestogo', 30)
+        limits['movetime_ms'] = max(10, min(remaining // 2, remaining // moves_to_go + increment // 2))
+    return limits
+
+def uci_loop():
+    """Reads UCI commands from stdin; searches run on a worker thread so `stop` stays responsive."""
+    search_thread = None
+    # `go ponder` searches without a clock; ponderhit starts it, stop abandons the search.
+    # Either one releases the bestmove, which UCI forbids sending while still pondering.
+    ponder_released = threading.Event()
+    ponder_movetime_ms = None
+    multipv = 1
+
+    def finish_search():
+        if search_thread is not None:
+            search_thread.join()
+
+    def run_search(limits):
+        result = search(info_callback=lambda r: _print_info(r, multipv), multipv=multipv, **limits)
+        if result['depth'] == 0:
+            print(_uci_info_line(result), flush=True)  # No iteration ran (mate/stalemate); still report the score
+        ponder_released.wait()
+        print(f"bestmove {result['best_move'] or '(none)'}", flush=True)
+
+    for line in sys.stdin:
+        tokens = line.split()
+        if not tokens:
+            continue
+        command = tokens[0]
+        if command == 'uci':
+            print(f"id name {ENGINE_NAME}", flush=True)
+            print("id author Chess GrandMaster", flush=True)
+            print(f"option name MultiPV type spin default 1 min 1 max {MAX_MULTIPV}", flush=True)
+            print("uciok", flush=True)
+        elif command == 'isready':
+            print("readyok", flush=True)
+        elif command == 'setoption':
+            # setoption name MultiPV value N; other options are ignored
+            if len(tokens) >= 5 and tokens[2].lower() == 'multipv' and tokens[3] == 'value':
+                multipv = max(1, min(MAX_MULTIPV, int(tokens[4])))
+        elif command == 'ucinewgame':
+            finish_search()
+            _tt.clear()
+        elif command == 'position':
+            finish_search()
+            _set_position(tokens[1:])
+        elif command == 'go':
+            finish_search()
+            limits = _go_limits(tokens[1:])
+            if 'ponder' in tokens:
+                ponder_movetime_ms = limits.pop('movetime_ms', None)
+                limits.setdefault('depth', MAX_PLY)
+                ponder_released.clear()
+            else:
+                ponder_released.set()
+            search_thread = threading.Thread(target=run_search, args=(limits,), daemon=True)
+            search_thread.start()
+        elif command == 'ponderhit':
+            if ponder_movetime_ms is not None:
+                start_clock(ponder_movetime_ms)
+                ponder_movetime_ms = None
+            ponder_released.set()
+        elif command == 'stop':
+            stop_search()
+            ponder_released.set()
+            finish_search()
+        elif command == 'quit':
+            stop_search()
+            ponder_released.set()
+            finish_search()
+            break
+
+# --- Benchmark ---
+BENCH_POSITIONS = [
+    ("startpos", START_FEN),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"),
+    ("middlegame", "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP1BBPPP/R2QK2R w KQ - 0 9"),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"),
+]
+
+def run_bench(depth, multipv=1):
+    """Fixed-depth search on the bench positions; prints nodes/sec and bestmove latency."""
+    total_nodes, total_time = 0, 0.0
+    for name, fen in BENCH_POSITIONS:
+        _tt.clear()
+        board_manager.load_fen(fen)
+        start = time.perf_counter()
+        result = search(depth=depth, multipv=multipv)
+        elapsed = time.perf_counter() - start
+        total_nodes += result['nodes']
+        total_time += elapsed
+        print(f"{name:<12} depth {depth}  bestmove {result['best_move']:<6} nodes {result['nodes']:>8}  "
+              f"latency {elapsed * 1000:8.1f} ms  {result['nodes'] / elapsed:8.0f} nodes/s")
+    print(f"{'total':<12} nodes {total_nodes}  avg latency {total_time / len(BENCH_POSITIONS) * 1000:.1f} ms  "
+          f"{total_nodes / total_time:.0f} nodes/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Built-in UCI chess engine.")
+    parser.add_argument('--bench', action='store_true', help="run the fixed-depth benchmark and exit")
+    parser.add_argument('--depth', type=int, default=4, help="benchmark search depth")
+    parser.add_argument('--multipv', type=int, default=1, help="benchmark lines per search")
+    args = parser.parse_args(argv)
+    if args.bench:
+        run_bench(args.depth, args.multipv)
+    else:
+        uci_loop()
+
+if __name__ == "__main__":
+    main()
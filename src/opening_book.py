@@ -0,0 +1,149 @@
+"""Polyglot opening book: the bot plays known opening moves without asking the engine.
+
+A Polyglot .bin file is a sorted array of 16-byte big-endian entries
+(key u64, move u16, weight u16, learn u32). The file is memory-mapped rather than read,
+so opening even a large book costs nothing, and a probe binary-searches the map in place
+with struct.unpack_from: no slices of the file and no per-probe lists. The position key
+(see polyglot_keys.py) is XOR-ed together from the piece bitboards. Among the entries for
+a position, one move is picked at random in proportion to its weight.
+
+    book = load_book("book.bin")
+    move = book.probe_move()   # e.g. "e2e4", or None when out of book
+"""
+import os
+import mmap
+import time
+import random
+import struct
+import logging
+import state
+import board_manager
+from polyglot_keys import RANDOM64, PIECE_OFFSET, CASTLE_OFFSET, EN_PASSANT_OFFSET, TURN_OFFSET
+
+logger = logging.getLogger(__name__)
+
+OPENING_BOOK_PATH = os.getenv("OPENING_BOOK")  # Polyglot .bin file; no book when unset
+ENTRY_SIZE = 16
+_ENTRY = struct.Struct(">QHHI")
+_KEY = struct.Struct(">Q")
+
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+# Keys per piece indexed by this project's square numbering (row 0 = rank 8), so hashing
+# is one lookup per piece: Polyglot's square 8 * rank + file is sq ^ 56
+PIECE_KEYS = {(color, t): [RANDOM64[PIECE_OFFSET + 64 * (2 * i + (color == 'white')) + (sq ^ 56)]
+                           for sq in range(64)]
+              for color in ('white', 'black') for i, t in enumerate(PIECE_TYPES)}
+CASTLE_KEYS = {flag: RANDOM64[CASTLE_OFFSET + i] for i, flag in enumerate('KQkq')}
+PROMOTION_LETTERS = ('', 'n', 'b', 'r', 'q')
+# Polyglot writes castling as king-takes-own-rook
+CASTLING_MOVES = {'e1h1': 'e1g1', 'e1a1': 'e1c1', 'e8h8': 'e8g8', 'e8a8': 'e8c8'}
+
+def polyglot_key():
+    """Polyglot hash of the current position."""
+    key = 0
+    for piece, bitboard in state.piece_bitboards.items():
+        keys = PIECE_KEYS[piece]
+        while bitboard:
+            low = bitboard & -bitboard
+            key ^= keys[low.bit_length() - 1]
+            bitboard ^= low
+    for flag in board_manager.castling_rights():
+        key ^= CASTLE_KEYS[flag]
+    target = state.pawn_en_passant_target
+    if target:
+        # Only hashed when a pawn of the side to move stands beside the pawn that just moved
+        row, col = target
+        color = state.current_turn_color
+        pawn_row = row + 1 if color == 'white' else row - 1
+        pawns = state.piece_bitboards[(color, 'pawn')]
+        if any(0 <= c < 8 and pawns >> (pawn_row * 8 + c) & 1 for c in (col - 1, col + 1)):
+            key ^= RANDOM64[EN_PASSANT_OFFSET + col]
+    if state.current_turn_color == 'white':
+        key ^= RANDOM64[TURN_OFFSET]
+    return key
+
+def decode_move(move):
+    """Polyglot 16-bit move -> UCI string (castling as the king's two-square move)."""
+    to_file, to_rank = move & 7, move >> 3 & 7
+    from_file, from_rank = move >> 6 & 7, move >> 9 & 7
+    uci = f"{'abcdefgh'[from_file]}{from_rank + 1}{'abcdefgh'[to_file]}{to_rank + 1}"
+    king = state.square_pieces[(7 - from_rank) * 8 + from_file]
+    if uci in CASTLING_MOVES and king is not None and king.type == 'king':
+        return CASTLING_MOVES[uci]
+    return uci + PROMOTION_LETTERS[move >> 12 & 7]
+
+class OpeningBook:
+    def __init__(self, path, rng=None):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap can't map an empty file; an empty book just never hits
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.entries = size // ENTRY_SIZE
+        self._rng = rng or random.Random()
+        self.stats = {'hits': 0, 'misses': 0, 'probe_ns': 0}
+
+    def _lower_bound(self, key):
+        """Index of the first entry with a key >= `key`."""
+        lo, hi = 0, self.entries
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if _KEY.unpack_from(self._map, mid * ENTRY_SIZE)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def probe(self, key):
+        """A weighted-random book move (Polyglot 16-bit) for `key`, or None if out of book."""
+        started = time.perf_counter_ns()
+        first = index = self._lower_bound(key)
+        total = 0
+        while index < self.entries:
+            entry_key, move, weight, _ = _ENTRY.unpack_from(self._map, index * ENTRY_SIZE)
+            if entry_key != key:
+                break
+            total += weight
+            index += 1
+        chosen = None
+        if index > first:
+            # Entries all of weight 0 are still playable, with equal chances
+            pick = self._rng.randrange(total) if total else self._rng.randrange(index - first)
+            for i in range(first, index):
+                _, move, weight, _ = _ENTRY.unpack_from(self._map, i * ENTRY_SIZE)
+                pick -= weight if total else 1
+                if pick < 0:
+                    chosen = move
+                    break
+        self.stats['hits' if chosen is not None else 'misses'] += 1
+        self.stats['probe_ns'] += time.perf_counter_ns() - started
+        return chosen
+
+    def probe_move(self):
+        """A book move for the current position as UCI, or None if out of book."""
+        move = self.probe(polyglot_key())
+        return decode_move(move) if move is not None else None
+
+    def summary(self):
+        probes = self.stats['hits'] + self.stats['misses']
+        return {'entries': self.entries, 'hits': self.stats['hits'], 'misses': self.stats['misses'],
+                'hit_rate': self.stats['hits'] / probes if probes else 0.0,
+                'avg_probe_us': self.stats['probe_ns'] / probes / 1000 if probes else 0.0}
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+def load_book(path=OPENING_BOOK_PATH):
+    """Opens the book at `path`; None if no path is set or the file can't be opened."""
+    if not path:
+        return None
+    try:
+        book = OpeningBook(path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Opening book disabled: {e}")
+        print(f"--- Opening book not loaded: {path} ---")
+        return None
+    print(f"--- Opening book loaded: {path} ({book.entries} entries) ---")
+    return book
@@ -0,0 +1,126 @@
+"""Headless perft runner: counts leaf nodes of the legal move tree to validate and time the rules engine.
+
+Run from the repository root, e.g.:
+    python src/perft.py                      # every standard position at its default depth
+    python src/perft.py -p kiwipete -d 3 --divide
+    python src/perft.py --fen "<fen>" -d 2
+Exits with status 1 if any node count differs from the known value.
+"""
+import sys
+import time
+import argparse
+
+import state
+import board_manager
+import engine
+import move_logic
+
+PROMOTION_TYPES = ('queen', 'rook', 'bishop', 'knight')
+PROMOTION_LETTERS = {'queen': 'q', 'rook': 'r', 'bishop': 'b', 'knight': 'n'}
+
+# name -> (FEN, known node counts for depth 1, 2, 3, ..., default depth)
+STANDARD_POSITIONS = {
+    'startpos': ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                 [20, 400, 8902, 197281, 4865609], 4),
+    'kiwipete': ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 [48, 2039, 97862, 4085603], 3),
+    'en_passant': ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                   [14, 191, 2812, 43238, 674624], 4),
+    'promotion': ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                  [6, 264, 9467, 422333], 3),
+    'promotion_checks': ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+                         [44, 1486, 62379, 2103487], 3),
+}
+
+def move_to_uci(start_pos, end_pos, promotion=None):
+    uci = f"{chr(ord('a') + start_pos[1])}{8 - start_pos[0]}{chr(ord('a') + end_pos[1])}{8 - end_pos[0]}"
+    return uci + PROMOTION_LETTERS[promotion] if promotion else uci
+
+def expand_promotions(start_pos, end_pos):
+    """Every promotion choice for a pawn reaching the last rank, else just [None]."""
+    piece = state.square_pieces[start_pos[0] * 8 + start_pos[1]]
+    if piece.type == 'pawn' and end_pos[0] in (0, 7):
+        return PROMOTION_TYPES
+    return (None,)
+
+def perft(depth):
+    """Number of leaf nodes `depth` plies below the current position."""
+    moves = move_logic.generate_all_legal_moves(state.current_turn_color)
+    if depth == 1:
+        nodes = 0
+        for start_pos, end_pos in moves:
+            nodes += len(expand_promotions(start_pos, end_pos))
+        return nodes
+
+    nodes = 0
+    for start_pos, end_pos in moves:
+        for promotion in expand_promotions(start_pos, end_pos):
+            record = engine.make_move(start_pos, end_pos, promotion or 'queen')
+            nodes += perft(depth - 1)
+            engine.unmake_move(record)
+    return nodes
+
+def divide(depth):
+    """Per-root-move node counts, as {uci_move: nodes}."""
+    results = {}
+    for start_pos, end_pos in move_logic.generate_all_legal_moves(state.current_turn_color):
+        for promotion in expand_promotions(start_pos, end_pos):
+            record = engine.make_move(start_pos, end_pos, promotion or 'queen')
+            results[move_to_uci(start_pos, end_pos, promotion)] = perft(depth - 1) if depth > 1 else 1
+            engine.unmake_move(record)
+    return results
+
+def run_position(name, fen, depth, expected=None, show_divide=False):
+    """Runs one perft, prints nodes and nodes/sec, and returns True if the count matches."""
+    board_manager.load_fen(fen)
+    start = time.perf_counter()
+    if show_divide:
+        per_move = divide(depth)
+        nodes = sum(per_move.values())
+    else:
+        nodes = perft(depth)
+    elapsed = time.perf_counter() - start
+
+    if show_divide:
+        for uci in sorted(per_move):
+            print(f"  {uci}: {per_move[uci]}")
+
+    nps = nodes / elapsed if elapsed > 0 else float('inf')
+    ok = expected is None or nodes == expected
+    verdict = "" if expected is None else ("OK" if ok else f"FAIL (expected {expected})")
+    print(f"{name:<18} depth {depth}  nodes {nodes:>10}  {elapsed:8.3f}s  {nps:>10.0f} nodes/s  {verdict}")
+    return ok
+
+def _depth(value):
+    """argparse type for -d: a whole number of plies, at least 1."""
+    try:
+        depth = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"depth must be a whole number, got {value!r}") from None
+    if depth < 1:
+        raise argparse.ArgumentTypeError(f"depth must be at least 1, got {value}")
+    return depth
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft regression and speed check for the rules engine.")
+    parser.add_argument('-p', '--position', choices=sorted(STANDARD_POSITIONS) + ['all'], default='all')
+    parser.add_argument('-d', '--depth', type=_depth, help="search depth (default: per-position)")
+    parser.add_argument('--fen', help="run a custom FEN instead of the standard positions")
+    parser.add_argument('--divide', action='store_true', help="print node counts per root move")
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        run_position('custom', args.fen, args.depth or 3, show_divide=args.divide)
+        return 0
+
+    names = sorted(STANDARD_POSITIONS) if args.position == 'all' else [args.position]
+    all_ok = True
+    for name in names:
+        fen, counts, default_depth = STANDARD_POSITIONS[name]
+        depth = args.depth or default_depth
+        expected = counts[depth - 1] if depth <= len(counts) else None
+        all_ok &= run_position(name, fen, depth, expected, args.divide)
+    return 0 if all_ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Piece sprite atlas: the 12 piece images are loaded once and cached at board size.
+
+Part of the GUI layer; the rules modules never import this.
+"""
+import os
+import pygame
+import constants
+
+# Absolute, so the game works no matter which directory it is started from
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+PIECE_COLORS = ('white', 'black')
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+
+_source_images = {}   # (color, type) -> Surface as loaded from disk
+_scaled_images = {}   # (color, type) -> Surface scaled to _scaled_size
+_scaled_size = None
+
+def image_path(color, type_name):
+    return os.path.join(IMAGE_DIR, f"{color}_{type_name}.png")
+
+def _prepare(surface):
+    # convert_alpha() needs a display; it makes blits much cheaper when one exists
+    return surface.convert_alpha() if pygame.display.get_surface() is not None else surface
+
+def load_sprites():
+    """Loads every piece image from disk. Call once after the window is created."""
+    for color in PIECE_COLORS:
+        for type_name in PIECE_TYPES:
+            _source_images[(color, type_name)] = _prepare(pygame.image.load(image_path(color, type_name)))
+    _scaled_images.clear()
+
+def _rescale(size):
+    global _scaled_size
+    if not _source_images:
+        load_sprites()
+    _scaled_images.clear()
+    for key, surface in _source_images.items():
+        _scaled_images[key] = _prepare(pygame.transform.scale(surface, (size, size)))
+    _scaled_size = size
+
+def get_piece_sprite(color, type_name):
+    """Board-sized sprite for a piece; rescaled only when constants.SQUARE_SIZE changes."""
+    if _scaled_size != constants.SQUARE_SIZE or not _scaled_images:
+        _rescale(constants.SQUARE_SIZE)
+    return _scaled_images[(color, type_name)]
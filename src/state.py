@@ -1,11 +1,32 @@
-import pygame
-import constants
+import os
+from array import array
+from models import BoardView
 
-# --- Initial Setup ---
-pygame.init()
+# Pure game data: importing this (or any rules module) never touches pygame.
+# The window is created by main.init_display().
 
-# The 8x8 chess board. It stores ChessPiece objects or None for empty squares.
-board = [[None for _ in range(8)] for _ in range(8)]
+# The position, square index = row * 8 + col (row 0 = rank 8). `squares` holds one small-int
+# piece code per square (models.piece_code, 0 = empty) and is the compact copy used for
+# snapshots; `square_pieces` holds the matching ChessPiece objects (which carry has_moved).
+# Both are mutated in place, never rebound, and only through board_manager.set_square().
+squares = bytearray(64)
+square_pieces = [None] * 64
+
+# The familiar 8x8 interface: board[row][col] -> ChessPiece or None (read-only view)
+board = BoardView(square_pieces)
+
+# Bitboards mirroring `board` (bit index = row * 8 + col). Only write squares through
+# board_manager.set_square() so these stay in sync.
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+piece_bitboards = {(color, t): 0 for color in ('white', 'black') for t in PIECE_TYPES}
+color_bitboards = {'white': 0, 'black': 0}
+
+# Per-color piece lists {(row, col): piece} and king squares, also kept by set_square()
+piece_lists = {'white': {}, 'black': {}}
+king_squares = {'white': None, 'black': None}
+
+# Set CHESS_DEBUG_CHECKS=1 to validate the bitboards/piece lists against the board after every move
+debug_consistency_checks = os.getenv("CHESS_DEBUG_CHECKS") == "1"
 
 # --- Global Game State ---
 current_turn_color = 'white'  # Current player color: 'white' or 'black'
@@ -13,7 +34,14 @@ active_selected_piece = None  # The piece object selected by the player
 active_selected_pos = None    # The (row, col) position of that piece
 legal_moves_for_selected = [] # Highlighted target squares for the UI
 pawn_en_passant_target = None # Square targeting an en passant capture
-move_history = []             # Stack to store move history for undoing
+move_history = array('H')     # Packed 16-bit moves, oldest first (see move_codec)
+undo_history = array('I')     # Packed undo info, parallel to move_history
+zobrist_key = 0               # 64-bit Zobrist key of the current position (see zobrist.py)
+halfmove_clock = 0            # Plies since the last capture or pawn move (fifty-move rule)
+fullmove_number = 1           # FEN move number, incremented after each Black move
+position_history = []         # Position key after every ply, for repetition detection
+removed_pieces = []           # Piece objects taken off the board (captures, promoted pawns), for unmake_move
+history_start = (1, 'white')  # Fullmove number and side to move where move_history starts
 
 # --- AI State ---
 ai_opponent_enabled = False
@@ -21,19 +49,17 @@ ai_coach_message = "I am your coach. Make a move or click 'Hint'!"
 ai_eval_score = "0.0"
 is_ai_thinking = False
 last_hint_move = ""   # e.g. "e2e4" – displayed below board
+hint_lines = []       # Last hint's candidates, best first: (uci, eval string, short PV)
 pending_ai_move = None  # Set by background thread: ((sr,sc),(er,ec))
 
 # --- Timer & History State ---
 timer_active = False
 timer_initial_seconds = 600.0  # Default 10 mins
+timer_increment_seconds = 0.0  # Added to the mover's clock after each move (CHESS_INCREMENT)
 white_time = 600.0
 black_time = 600.0
-game_move_log = []            # List of strings: "1. White: E2-E4"
 
 # --- UI State ---
 current_theme_idx = 0
+screen = None                 # Display surface, created by main.init_display()
 
-# Create the screen
-# Create the screen (re-calculate width with new constants)
-screen = pygame.display.set_mode((constants.WINDOW_W, constants.WINDOW_H))
-pygame.display.set_caption("Chess AI — Grandmaster Coach")
@@ -0,0 +1,71 @@
+"""Checks for analysis_cache: depth rules in memory and in the SQLite tier.
+
+    python -m pytest src/test_analysis_cache.py    (or: python src/test_analysis_cache.py)
+"""
+import os
+import tempfile
+from analysis_cache import AnalysisCache
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+OTHER_FEN = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+
+def _entry(depth, best_move="e2e4"):
+    return {'best_move': best_move, 'score': {'type': 'cp', 'value': 20}, 'depth': depth,
+            'nodes': 0, 'nps': 0, 'time_ms': 0, 'pv': [best_move], 'lines': []}
+
+def test_deeper_entry_is_kept_in_memory():
+    cache = AnalysisCache()
+    cache.put(START_FEN, _entry(20))
+    cache.put(START_FEN, _entry(5, "d2d4"))
+    assert cache.get(START_FEN, 10)['best_move'] == "e2e4"
+
+def test_shallow_write_does_not_replace_deeper_disk_row():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "cache.db")
+        cache = AnalysisCache(max_entries=1, disk_path=path)
+        cache.put(START_FEN, _entry(20))
+        cache.put(OTHER_FEN, _entry(3, "e7e5"))   # Evicts START_FEN from memory
+        cache.put(START_FEN, _entry(5, "d2d4"))
+        fresh = AnalysisCache(disk_path=path)
+        entry = fresh.get(START_FEN, 10)
+        assert entry is not None and entry['depth'] == 20 and entry['best_move'] == "e2e4"
+
+def _multipv_entry(depth, moves=("e2e4", "d2d4", "g1f3")):
+    entry = _entry(depth, moves[0])
+    entry['multipv'] = len(moves)
+    entry['lines'] = [{'move': move, 'score': {'type': 'cp', 'value': 20 - i}, 'depth': depth, 'pv': [move]}
+                      for i, move in enumerate(moves)]
+    return entry
+
+def test_deeper_single_line_does_not_block_multipv_lines():
+    cache = AnalysisCache()
+    cache.put(START_FEN, _entry(20))
+    cache.put(START_FEN, _multipv_entry(15))
+    hint = cache.get(START_FEN, 15, 3)
+    assert hint is not None and [line['move'] for line in hint['lines']] == ["e2e4", "d2d4", "g1f3"]
+    assert hint['depth'] == 20                  # The deeper main result is kept
+    assert cache.get(START_FEN, 16, 3) is None  # The lines themselves are only depth 15
+
+def test_later_single_line_keeps_multipv_lines():
+    cache = AnalysisCache()
+    cache.put(START_FEN, _multipv_entry(15))
+    cache.put(START_FEN, _entry(20))
+    assert cache.get(START_FEN, 20)['depth'] == 20
+    assert cache.get(START_FEN, 15, 3)['multipv_depth'] == 15
+
+def test_multipv_lines_merge_into_evicted_disk_row():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "cache.db")
+        cache = AnalysisCache(max_entries=1, disk_path=path)
+        cache.put(START_FEN, _entry(20))
+        cache.put(OTHER_FEN, _entry(3, "e7e5"))   # Evicts START_FEN from memory
+        cache.put(START_FEN, _multipv_entry(15))
+        fresh = AnalysisCache(disk_path=path)
+        assert fresh.get(START_FEN, 20)['depth'] == 20
+        assert fresh.get(START_FEN, 15, 3) is not None
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name} OK")
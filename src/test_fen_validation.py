@@ -0,0 +1,54 @@
+"""Checks that load_fen() rejects positions the rules engine can't play, and leaves the board alone.
+
+    python -m pytest src/test_fen_validation.py    (or: python src/test_fen_validation.py)
+"""
+import board_manager
+from uci_utils import generate_fen
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+def _rejects(fen):
+    board_manager.load_fen(START_FEN)
+    try:
+        board_manager.load_fen(fen)
+    except ValueError:
+        return board_manager.position_key() == board_manager.compute_zobrist_key() and generate_fen() == START_FEN
+    return False
+
+def test_valid_positions_load():
+    for fen in (START_FEN,
+                "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3",
+                "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+                "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1"):
+        board_manager.load_fen(fen)
+        assert generate_fen() == fen
+
+def test_missing_king_is_rejected():
+    assert _rejects("rnbq1bnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQ - 0 1")
+    assert _rejects("8/8/8/8/8/8/8/4K3 w - - 0 1")
+
+def test_duplicate_king_is_rejected():
+    assert _rejects("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBKKBNR w kq - 0 1")
+    assert _rejects("k7/8/8/8/8/8/8/k3K3 b - - 0 1")
+
+def test_en_passant_on_wrong_rank_is_rejected():
+    # After a White double push the target is on rank 3 and Black is to move
+    assert _rejects("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e3 0 1")
+    assert _rejects("rnbqkbnr/ppp1pppp/8/3p4/8/8/PPPPPPPP/RNBQKBNR b KQkq d6 0 1")
+
+def test_negative_move_counters_are_rejected():
+    assert _rejects("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - -1 1")
+    assert _rejects("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 -3")
+
+def test_side_not_to_move_in_check_is_rejected():
+    # Black's king could be captured straight away
+    assert _rejects("4k3/4R3/8/8/8/8/8/4K3 w - - 0 1")
+    assert _rejects("4k3/8/8/8/8/8/3p4/4K3 b - - 0 1")
+    # The side to move may be in check
+    board_manager.load_fen("4k3/4R3/8/8/8/8/8/4K3 b - - 0 1")
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name} OK")
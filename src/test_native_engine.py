@@ -0,0 +1,31 @@
+"""Checks that MultiPV lines don't depend on what an earlier search left in the transposition table.
+
+    python -m pytest src/test_native_engine.py    (or: python src/test_native_engine.py)
+"""
+import native_engine
+
+AFTER_E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+def _lines(result):
+    return [(line['move'], line['score']) for line in result['lines']]
+
+def test_multipv_on_warm_table_matches_cold_table():
+    native_engine._tt.clear()
+    cold = native_engine.search_fen(AFTER_E4, depth=3, multipv=3)
+    native_engine._tt.clear()
+    native_engine.search_fen(AFTER_E4, depth=4)
+    warm = native_engine.search_fen(AFTER_E4, depth=3, multipv=3)
+    assert len(cold['lines']) == 3
+    assert _lines(warm) == _lines(cold)
+
+def test_single_line_search_still_reuses_table():
+    native_engine._tt.clear()
+    cold = native_engine.search_fen(AFTER_E4, depth=3)
+    warm = native_engine.search_fen(AFTER_E4, depth=3)
+    assert warm['nodes'] < cold['nodes']
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"ok  {name}")
@@ -0,0 +1,52 @@
+"""Checks that unmake_move() puts back the very piece objects make_move() removed, and that
+the move log is numbered from the loaded position.
+
+    python -m pytest src/test_undo.py    (or: python src/test_undo.py)
+"""
+import state
+import engine
+import board_manager
+from uci_utils import generate_fen
+
+def _square(name):
+    return (8 - int(name[1])) * 8 + 'abcdefgh'.index(name[0])
+
+def _play(uci):
+    return engine.make_move(divmod(_square(uci[:2]), 8), divmod(_square(uci[2:4]), 8))
+
+def test_capture_promotion_restores_original_pieces():
+    fen = "1r2k3/P7/8/8/8/8/8/4K3 w - - 0 40"
+    board_manager.load_fen(fen)
+    pawn, rook = state.square_pieces[_square('a7')], state.square_pieces[_square('b8')]
+    record = _play('a7b8')
+    assert state.square_pieces[_square('b8')].type == 'queen'
+    engine.unmake_move(record)
+    assert state.square_pieces[_square('a7')] is pawn
+    assert state.square_pieces[_square('b8')] is rook
+    assert generate_fen() == fen
+
+def test_en_passant_restores_original_pawn():
+    fen = "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2"
+    board_manager.load_fen(fen)
+    black_pawn = state.square_pieces[_square('d5')]
+    record = _play('e5d6')
+    assert state.square_pieces[_square('d5')] is None
+    engine.unmake_move(record)
+    assert state.square_pieces[_square('d5')] is black_pawn
+    assert generate_fen() == fen
+
+def test_move_log_numbers_from_loaded_position():
+    board_manager.load_fen("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 12")
+    for uci in ('e7e5', 'g1f3', 'b8c6'):
+        record = _play(uci)
+        state.move_history.append(record[0])
+        state.undo_history.append(record[1])
+    assert engine.move_log_entries() == ["Move 12 Black: E7 - E5",
+                                         "Move 13 White: G1 - F3",
+                                         "Move 13 Black: B8 - C6"]
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"ok  {name}")
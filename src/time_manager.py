@@ -0,0 +1,73 @@
+"""Think-time budgeting for the bot from the live game clocks.
+
+With the clock running, the bot's search gets the real clocks (`go wtime/btime/winc/binc`)
+plus a `movetime` cap from budget_ms(), so the engine's own time management can only spend
+less. The engine driver stops the search once the cap plus a small margin has passed,
+whatever the engine does. Below BOT_LOW_TIME_MS the bot stops searching properly and plays
+a fallback: any cached analysis, else a depth-1 search. Without a clock it searches to
+ANALYSIS_DEPTH, still under the BOT_MAX_THINK_MS ceiling.
+"""
+import os
+import time
+import state
+
+BOT_MAX_THINK_MS = int(os.getenv("BOT_MAX_THINK_MS", "15000"))  # Hard ceiling whatever the clock says
+BOT_LOW_TIME_MS = int(os.getenv("BOT_LOW_TIME_MS", "3000"))     # Below this, play a fallback move
+MOVES_TO_GO = 30          # Assumed moves left in the game when splitting the clock
+MIN_THINK_MS = 50
+STOP_MARGIN_MS = 250      # Time for `stop` to land once the budget is spent
+FALLBACK_DEPTH = 1
+
+# One entry per bot move: {'ply', 'mode', 'budget_ms', 'actual_ms', 'remaining_ms'};
+# ai_agent records book moves with mode 'book'
+think_log = []
+
+def budget_ms(remaining_ms, increment_ms):
+    """Think time for one move: an even share of the clock plus most of the increment,
+    never more than a third of what is left or BOT_MAX_THINK_MS."""
+    budget = remaining_ms // MOVES_TO_GO + increment_ms * 3 // 4
+    budget = min(budget, remaining_ms // 3, BOT_MAX_THINK_MS)
+    return max(MIN_THINK_MS, budget)
+
+def plan_move(color):
+    """How the bot playing `color` should search now.
+
+    Returns {'mode': 'depth'|'clock'|'fallback', 'go_args' (None = the default depth search),
+    'cache_depth' (None = ANALYSIS_DEPTH), 'budget_ms', 'timeout_s', 'remaining_ms', 'started'}.
+    """
+    plan = {'mode': 'depth', 'go_args': None, 'cache_depth': None, 'budget_ms': BOT_MAX_THINK_MS,
+            'timeout_s': BOT_MAX_THINK_MS / 1000.0, 'remaining_ms': None, 'started': time.perf_counter()}
+    if not state.timer_active:
+        return plan
+    wtime = max(0, int(state.white_time * 1000))
+    btime = max(0, int(state.black_time * 1000))
+    increment = int(state.timer_increment_seconds * 1000)
+    remaining = wtime if color == 'white' else btime
+    plan['remaining_ms'] = remaining
+    if remaining <= BOT_LOW_TIME_MS:
+        budget = min(max(MIN_THINK_MS, remaining // 20), 200)
+        plan.update(mode='fallback', go_args=f"depth {FALLBACK_DEPTH} movetime {budget}", cache_depth=1,
+                    budget_ms=budget)
+    else:
+        budget = budget_ms(remaining, increment)
+        plan.update(mode='clock', budget_ms=budget,
+                    go_args=f"wtime {wtime} btime {btime} winc {increment} binc {increment} movetime {budget}")
+    plan['timeout_s'] = (plan['budget_ms'] + STOP_MARGIN_MS) / 1000.0
+    return plan
+
+def record(plan, ply):
+    """Logs how long the bot actually thought against the plan's budget; returns the entry."""
+    entry = {'ply': ply, 'mode': plan['mode'], 'budget_ms': plan['budget_ms'],
+             'actual_ms': int((time.perf_counter() - plan['started']) * 1000),
+             'remaining_ms': plan['remaining_ms']}
+    think_log.append(entry)
+    return entry
+
+def summary():
+    """Totals over the game: moves, budgeted vs actual time, and moves that ran over budget."""
+    return {'moves': len(think_log),
+            'budget_ms': sum(e['budget_ms'] for e in think_log),
+            'actual_ms': sum(e['actual_ms'] for e in think_log),
+            'over_budget': sum(1 for e in think_log if e['actual_ms'] > e['budget_ms']),
+            'fallbacks': sum(1 for e in think_log if e['mode'] == 'fallback'),
+            'book_moves': sum(1 for e in think_log if e['mode'] == 'book')}
@@ -0,0 +1,210 @@
+"""Asyncio UCI engine driver.
+
+UciEngine runs one engine process with asyncio.create_subprocess_exec. A reader task
+parses its output line by line without blocking: `info` lines update the running search
+(and go to an optional callback as they stream in), and `bestmove` resolves the search's
+future. One EngineLoop thread runs the event loop for every engine, so many engines are
+driven by a single thread instead of one thread per request.
+
+Inside the loop (or from a batch tool using asyncio.run), await directly:
+
+    engine = await UciEngine.start([sys.executable, "native_engine.py"])
+    result = await engine.analyse(fen, "depth 6", timeout=10)
+
+From other threads, submit a coroutine and poll or block on the returned future:
+
+    future = engine_loop.submit(engine.analyse(fen, "depth 6"))
+    if future.done(): result = future.result()
+"""
+import os
+import asyncio
+import threading
+import itertools
+import logging
+from uci_utils import parse_info_line
+
+logger = logging.getLogger(__name__)
+
+HANDSHAKE_TIMEOUT_S = 10
+STOP_GRACE_S = 2  # How long a timed-out search gets to answer `stop` before the engine is killed
+
+class EngineError(Exception):
+    """The engine died, hung or was misused (e.g. two searches at once)."""
+
+class Search:
+    """One `go`: its id, the result being filled in and the future resolved on `bestmove`."""
+    __slots__ = ('id', 'future', 'result', 'info_callback', 'white_to_move')
+
+    def __init__(self, search_id, future, info_callback, white_to_move):
+        self.id = search_id
+        self.future = future
+        self.info_callback = info_callback
+        self.white_to_move = white_to_move
+        self.result = {'best_move': None, 'score': {'type': 'cp', 'value': 0}, 'depth': 0,
+                       'nodes': 0, 'nps': 0, 'time_ms': 0, 'pv': [], 'lines': []}
+
+def _flip(score):
+    return {'type': score['type'], 'value': -score['value']}
+
+class UciEngine:
+    def __init__(self, proc, name):
+        self.proc = proc
+        self.name = name
+        self.search = None          # The running Search, if any
+        self.options = {}           # Values last sent with setoption
+        self._search_ids = itertools.count(1)
+        self._reply = None          # (expected first token, future) during a handshake
+        self._reader = asyncio.get_running_loop().create_task(self._read_loop())
+
+    @classmethod
+    async def start(cls, argv, options=None, name=None):
+        """Launches `argv`, completes the UCI handshake and applies `options` (setoption)."""
+        proc = await asyncio.create_subprocess_exec(
+            *argv, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL)
+        engine = cls(proc, name or os.path.basename(argv[-1]))
+        try:
+            await engine._handshake('uci', 'uciok')
+            for option, value in (options or {}).items():
+                engine.set_option(option, value)
+            await engine._handshake('isready', 'readyok')
+        except Exception:
+            engine.kill()
+            raise
+        return engine
+
+    def set_option(self, option, value):
+        """Sends `setoption` unless the engine already has this value; call between searches."""
+        if self.options.get(option) != value:
+            self.send(f"setoption name {option} value {value}")
+            self.options[option] = value
+
+    def is_alive(self):
+        return self.proc.returncode is None and not self._reader.done()
+
+    def send(self, command):
+        if not self.is_alive():
+            raise EngineError(f"{self.name} is not running")
+        self.proc.stdin.write((command + "\n").encode())
+
+    async def _handshake(self, command, reply):
+        future = asyncio.get_running_loop().create_future()
+        self._reply = (reply, future)
+        self.send(command)
+        try:
+            await asyncio.wait_for(future, HANDSHAKE_TIMEOUT_S)
+        finally:
+            self._reply = None
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self.proc.stdout.readline()
+                if not line:
+                    break
+                self._dispatch(line.decode(errors='replace').split())
+        finally:
+            # The engine is gone: fail whoever is still waiting on it
+            error = EngineError(f"{self.name} exited")
+            if self._reply and not self._reply[1].done():
+                self._reply[1].set_exception(error)
+            if self.search and not self.search.future.done():
+                self.search.future.set_exception(error)
+            self.search = None
+
+    def _dispatch(self, tokens):
+        if not tokens:
+            return
+        if self._reply and tokens[0] == self._reply[0] and not self._reply[1].done():
+            self._reply[1].set_result(None)
+            return
+        search = self.search
+        if search is None:
+            return
+        if tokens[0] == 'info':
+            if parse_info_line(tokens, search.result) and search.info_callback:
+                try:
+                    search.info_callback(dict(search.result))
+                except Exception as e:
+                    logger.error(f"Info callback error: {e}")
+        elif tokens[0] == 'bestmove':
+            self.search = None
+            result = search.result
+            result['best_move'] = None if len(tokens) < 2 or tokens[1] == '(none)' else tokens[1]
+            result['lines'] = [line for line in result['lines'] if line]
+            # UCI scores are from the side to move; results are White-relative
+            if not search.white_to_move:
+                result['score'] = _flip(result['score'])
+                for line in result['lines']:
+                    line['score'] = _flip(line['score'])
+            if not search.future.done():
+                search.future.set_result(result)
+
+    def go(self, fen, go_args, moves=(), info_callback=None):
+        """Starts a search of `fen` (plus UCI `moves`) and returns its Search right away."""
+        if self.search is not None:
+            raise EngineError(f"{self.name} is already searching")
+        white_to_move = (fen.split()[1] == 'w') != (len(moves) % 2 == 1)
+        position = f"position fen {fen}" + (f" moves {' '.join(moves)}" if moves else "")
+        self.send(position)
+        self.send(f"go {go_args}")
+        self.search = Search(next(self._search_ids), asyncio.get_running_loop().create_future(),
+                             info_callback, white_to_move)
+        return self.search
+
+    def stop(self, search_id=None):
+        """Sends `stop` if a search (the one with `search_id`, if given) is still running."""
+        if self.search is not None and (search_id is None or self.search.id == search_id):
+            self.send("stop")
+
+    def ponderhit(self, search_id=None):
+        if self.search is not None and (search_id is None or self.search.id == search_id):
+            self.send("ponderhit")
+
+    async def wait(self, search, timeout=None):
+        """The search's result; after `timeout` seconds it is stopped, and a hung engine is killed."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(search.future), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} search timed out after {timeout}s; stopping it")
+            self.stop(search.id)
+        try:
+            return await asyncio.wait_for(search.future, STOP_GRACE_S)
+        except asyncio.TimeoutError:
+            self.kill()
+            raise EngineError(f"{self.name} did not answer stop") from None
+
+    async def analyse(self, fen, go_args, moves=(), info_callback=None, timeout=None):
+        """go() + wait() in one call."""
+        return await self.wait(self.go(fen, go_args, moves, info_callback), timeout)
+
+    async def quit(self):
+        if self.is_alive():
+            try:
+                self.send("quit")
+                await asyncio.wait_for(self.proc.wait(), 2)
+            except Exception:
+                self.kill()
+
+    def kill(self):
+        if self.proc.returncode is None:
+            self.proc.kill()
+
+class EngineLoop:
+    """An asyncio event loop on one daemon thread that drives every engine."""
+    def __init__(self, name="uci-driver"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        """Schedules `coro` on the loop; returns a concurrent.futures.Future to poll or wait on."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro, timeout=None):
+        """Runs `coro` on the loop and blocks the calling thread for its result."""
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, callback, *args):
+        """Runs a plain function on the loop thread (e.g. engine.stop from the UI thread)."""
+        self.loop.call_soon_threadsafe(callback, *args)
@@ -1,4 +1,5 @@
 import state
+import board_manager
 
 def uci_to_grid(uci):
     """Translates UCI string (e2e4) to ((start_r, start_c), (end_r, end_c))."""
@@ -9,33 +10,95 @@ def uci_to_grid(uci):
     end_r = 8 - int(uci[3])
     return (start_r, start_c), (end_r, end_c)
 
+def parse_info_line(tokens, result):
+    """Folds one `info ...` line (split into tokens) into `result`.
+
+    Only lines carrying a score are taken; they update depth, nodes, nps, time_ms, score
+    ({'type': 'cp'|'mate', 'value'}, side-to-move relative as UCI sends it) and pv.
+    With MultiPV, line k also goes to result['lines'][k-1] as {'move', 'score', 'depth', 'pv'},
+    and only line 1 updates the main score and pv. Returns True if the line was used.
+    """
+    if 'score' not in tokens:
+        return False
+    i = tokens.index('score')
+    score = {'type': tokens[i + 1], 'value': int(tokens[i + 2])}
+    pv = tokens[tokens.index('pv') + 1:] if 'pv' in tokens else []
+    depth = int(tokens[tokens.index('depth') + 1]) if 'depth' in tokens else result.get('depth', 0)
+    rank = int(tokens[tokens.index('multipv') + 1]) if 'multipv' in tokens else 1
+    if 'multipv' in tokens and pv:
+        lines = result.setdefault('lines', [])
+        while len(lines) < rank:
+            lines.append(None)
+        lines[rank - 1] = {'move': pv[0], 'score': score, 'depth': depth, 'pv': pv}
+    for field in ('nodes', 'nps'):
+        if field in tokens:
+            result[field] = int(tokens[tokens.index(field) + 1])
+    if 'time' in tokens:
+        result['time_ms'] = int(tokens[tokens.index('time') + 1])
+    if rank == 1:
+        result['score'] = score
+        result['depth'] = depth
+        if pv:
+            result['pv'] = pv
+    return True
+
+# FEN of the last position it was generated for; any move, undo or load changes the key
+_fen_cache_key = None
+_fen_cache_value = None
+fen_cache_hits = 0
+fen_cache_misses = 0
+
+PIECE_LETTERS = {
+    ('white', 'pawn'): 'P', ('white', 'knight'): 'N', ('white', 'bishop'): 'B',
+    ('white', 'rook'): 'R', ('white', 'queen'): 'Q', ('white', 'king'): 'K',
+    ('black', 'pawn'): 'p', ('black', 'knight'): 'n', ('black', 'bishop'): 'b',
+    ('black', 'rook'): 'r', ('black', 'queen'): 'q', ('black', 'king'): 'k'
+}
+
 def generate_fen():
-    """Generates the FEN string for the current board state."""
+    """Returns the FEN string for the current board state (cached per position and move counters)."""
+    global _fen_cache_key, _fen_cache_value, fen_cache_hits, fen_cache_misses
+    key = (board_manager.position_key(), state.halfmove_clock, state.fullmove_number)
+    if key == _fen_cache_key:
+        fen_cache_hits += 1
+        return _fen_cache_value
+    fen_cache_misses += 1
+    fen = _build_fen()
+    _fen_cache_key, _fen_cache_value = key, fen
+    return fen
+
+def invalidate_fen_cache():
+    global _fen_cache_key, _fen_cache_value
+    _fen_cache_key = None
+    _fen_cache_value = None
+
+def fen_cache_stats():
+    """Hit/miss counters of the FEN cache."""
+    return {'hits': fen_cache_hits, 'misses': fen_cache_misses}
+
+def _build_fen():
+    """Builds the FEN string for the current board state from scratch."""
     fen_parts = []
     
     # 1. Piece placement
-    piece_map = {
-        ('white', 'pawn'): 'P', ('white', 'knight'): 'N', ('white', 'bishop'): 'B',
-        ('white', 'rook'): 'R', ('white', 'queen'): 'Q', ('white', 'king'): 'K',
-        ('black', 'pawn'): 'p', ('black', 'knight'): 'n', ('black', 'bishop'): 'b',
-        ('black', 'rook'): 'r', ('black', 'queen'): 'q', ('black', 'king'): 'k'
-    }
-    
+    # Group pieces by rank straight from the piece lists instead of scanning 64 squares
+    ranks = [[] for _ in range(8)]
+    for color in ('white', 'black'):
+        for (r, c), p in state.piece_lists[color].items():
+            ranks[r].append((c, PIECE_LETTERS[(p.color, p.type)]))
+
     rows = []
-    for r in range(8):
-        empty_count = 0
+    for rank in ranks:
+        rank.sort()
         row_str = ""
-        for c in range(8):
-            p = state.board[r][c]
-            if p:
-                if empty_count > 0:
-                    row_str += str(empty_count)
-                    empty_count = 0
-                row_str += piece_map[(p.color, p.type)]
-            else:
-                empty_count += 1
-        if empty_count > 0:
-            row_str += str(empty_count)
+        next_col = 0
+        for c, letter in rank:
+            if c > next_col:
+                row_str += str(c - next_col)
+            row_str += letter
+            next_col = c + 1
+        if next_col < 8:
+            row_str += str(8 - next_col)
         rows.append(row_str)
     fen_parts.append("/".join(rows))
     
@@ -43,31 +106,7 @@ def generate_fen():
     fen_parts.append('w' if state.current_turn_color == 'white' else 'b')
     
     # 3. Castling ability
-    castling = ""
-    # White
-    wk = state.board[7][4]
-    if wk and wk.type == 'king' and wk.color == 'white' and not wk.has_moved:
-        # Kingside
-        wr_k = state.board[7][7]
-        if wr_k and wr_k.type == 'rook' and wr_k.color == 'white' and not wr_k.has_moved:
-            castling += "K"
-        # Queenside
-        wr_q = state.board[7][0]
-        if wr_q and wr_q.type == 'rook' and wr_q.color == 'white' and not wr_q.has_moved:
-            castling += "Q"
-    # Black
-    bk = state.board[0][4]
-    if bk and bk.type == 'king' and bk.color == 'black' and not bk.has_moved:
-        # Kingside
-        br_k = state.board[0][7]
-        if br_k and br_k.type == 'rook' and br_k.color == 'black' and not br_k.has_moved:
-            castling += "k"
-        # Queenside
-        br_q = state.board[0][0]
-        if br_q and br_q.type == 'rook' and br_q.color == 'black' and not br_q.has_moved:
-            castling += "q"
-    
-    fen_parts.append(castling if castling else "-")
+    fen_parts.append(board_manager.castling_rights() or "-")
     
     # 4. En passant target square
     if state.pawn_en_passant_target:
@@ -79,9 +118,9 @@ def generate_fen():
         fen_parts.append("-")
     
     # 5. Halfmove clock
-    fen_parts.append("0")
+    fen_parts.append(str(state.halfmove_clock))
     
     # 6. Fullmove number
-    fen_parts.append("1")
+    fen_parts.append(str(state.fullmove_number))
     
     return " ".join(fen_parts)
@@ -1,7 +1,9 @@
 import pygame
 import constants
 import state
-from move_physics import is_king_in_check
+import game_status
+import engine
+import sprites
 
 def get_sq_rect(row, col):
     """Returns the pygame.Rect for a board square."""
@@ -55,16 +57,17 @@ def draw_chess_board():
     """Renders the grid, highlights, coordinate labels."""
     light, dark = constants.BOARD_THEMES[state.current_theme_idx]
 
+    # Highlight king in check (status is cached per position, so this is free on most frames)
+    checked_king = None
+    if game_status.evaluate_position() in (game_status.CHECK, game_status.CHECKMATE):
+        checked_king = state.king_squares[state.current_turn_color]
+
     for row in range(8):
         for col in range(8):
             sq_rect = get_sq_rect(row, col)
             square_color = light if (row + col) % 2 == 0 else dark
-
-            # Highlight king in check
-            p = state.board[row][col]
-            if p and p.type == 'king' and p.color == state.current_turn_color:
-                if is_king_in_check(state.current_turn_color):
-                    square_color = (210, 60, 60)
+            if (row, col) == checked_king:
+                square_color = (210, 60, 60)
 
             pygame.draw.rect(state.screen, square_color, sq_rect)
 
@@ -112,15 +115,13 @@ def draw_chess_board():
 
 def draw_all_pieces():
     """Draws piece images on top of the squares."""
-    for row in range(8):
-        for col in range(8):
-            p = state.board[row][col]
-            if p:
-                sq_rect = get_sq_rect(row, col)
-                state.screen.blit(p.image, sq_rect.topleft)
+    for color in ('white', 'black'):
+        for (row, col), p in state.piece_lists[color].items():
+            sq_rect = get_sq_rect(row, col)
+            state.screen.blit(sprites.get_piece_sprite(p.color, p.type), sq_rect.topleft)
 
 def draw_bottom_bar():
-    """Draws the bottom bar showing the last hint move."""
+    """Draws the bottom bar showing the last hint move and its runner-up alternatives."""
     bar_y = constants.TOPBAR_HEIGHT + constants.BOARD_LABEL_SIZE + constants.BOARD_PX
     bar_w = constants.BOARD_OFFSET_X + constants.BOARD_PX
     pygame.draw.rect(state.screen, constants.BG_DARK, (0, bar_y, bar_w, constants.BOTTOM_BAR_HEIGHT))
@@ -132,6 +133,11 @@ def draw_bottom_bar():
         move_txt = font.render(state.last_hint_move.upper(), True, constants.YELLOW)
         state.screen.blit(prefix, (12, bar_y + 10))
         state.screen.blit(move_txt, (12 + prefix.get_width(), bar_y + 10))
+        others = [f"{move.upper()} {score}" for move, score, _ in state.hint_lines if move != state.last_hint_move]
+        if others:
+            small = pygame.font.SysFont('Segoe UI', 14)
+            alt_txt = small.render("Also:  " + "   ".join(others), True, constants.TEXT_DIM)
+            state.screen.blit(alt_txt, (24 + prefix.get_width() + move_txt.get_width(), bar_y + 12))
     else:
         hint_txt = font.render("Click \"GET HINT\" to see the best move.", True, constants.TEXT_DIM)
         state.screen.blit(hint_txt, (12, bar_y + 10))
@@ -303,8 +309,7 @@ def draw_history_panel():
     y += 12
     
     # Show last 30 moves
-    log_slice = state.game_move_log[-30:]
-    for entry in log_slice:
+    for entry in engine.move_log_entries(30):
         entry_surf = font_log.render(entry, True, constants.TEXT_BRIGHT)
         state.screen.blit(entry_surf, (hx + pad, y))
         y += entry_surf.get_height() + 5
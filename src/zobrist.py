@@ -0,0 +1,30 @@
+"""Zobrist hashing tables: a 64-bit position key built by XOR-ing one random number per feature.
+
+board_manager.set_square() and engine.make_move() XOR these in and out as the position
+changes, so state.zobrist_key is always current without rescanning the board.
+"""
+import random
+
+# Fixed seed so keys are identical across runs (useful for persisted caches and debugging)
+_rng = random.Random(0x5EED_C0DE)
+
+def _rand64():
+    return _rng.getrandbits(64)
+
+PIECE_KEYS = {(color, t): [_rand64() for _ in range(64)]
+              for color in ('white', 'black')
+              for t in ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')}
+BLACK_TO_MOVE_KEY = _rand64()
+CASTLING_KEYS = {flag: _rand64() for flag in 'KQkq'}
+EN_PASSANT_FILE_KEYS = [_rand64() for _ in range(8)]
+
+def castling_key(rights):
+    """Combined key for a castling rights string such as 'KQkq' or ''."""
+    key = 0
+    for flag in rights:
+        key ^= CASTLING_KEYS[flag]
+    return key
+
+def en_passant_key(target):
+    """Key for an en passant target square (row, col), or 0 when there is none."""
+    return EN_PASSANT_FILE_KEYS[target[1]] if target else 0